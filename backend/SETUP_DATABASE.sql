@@ -5,6 +5,16 @@
 -- Enable UUID extension
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
+-- Zoos and the regions that group them; every tenant row carries a zoo_id
+CREATE TABLE IF NOT EXISTS zoos (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    name VARCHAR(255) NOT NULL,
+    level VARCHAR(20) NOT NULL DEFAULT 'zoo' CHECK (level IN ('region', 'zoo')),
+    parent_id UUID REFERENCES zoos(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Users table
 CREATE TABLE IF NOT EXISTS users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -12,6 +22,7 @@ CREATE TABLE IF NOT EXISTS users (
     name VARCHAR(255) NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
     role VARCHAR(50) NOT NULL CHECK (role IN ('zookeeper', 'vet', 'admin', 'officer')),
+    zoo_id UUID REFERENCES zoos(id),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -22,10 +33,13 @@ CREATE TABLE IF NOT EXISTS animals (
     name VARCHAR(255) NOT NULL,
     species VARCHAR(255) NOT NULL,
     number VARCHAR(100),
+    age VARCHAR(50),
+    enclosure VARCHAR(255),
     image_url TEXT,
     health VARCHAR(50) DEFAULT 'good' CHECK (health IN ('excellent', 'good', 'fair', 'poor')),
     last_checked TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     assigned_to UUID REFERENCES users(id),
+    zoo_id UUID REFERENCES zoos(id),
     mood VARCHAR(255),
     appetite VARCHAR(255),
     notes TEXT,
@@ -38,6 +52,7 @@ CREATE TABLE IF NOT EXISTS observations (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     animal_id UUID REFERENCES animals(id) ON DELETE CASCADE,
     zookeeper_id UUID REFERENCES users(id),
+    zoo_id UUID REFERENCES zoos(id),
     date_or_day VARCHAR(100) NOT NULL,
     animal_observed_on_time BOOLEAN DEFAULT TRUE,
     clean_drinking_water_provided BOOLEAN DEFAULT TRUE,
@@ -55,8 +70,14 @@ CREATE TABLE IF NOT EXISTS observations (
     audio_url TEXT,
     images JSONB,
     video_url TEXT,
+    transcript TEXT,
     vet_comments TEXT,
     is_emergency BOOLEAN DEFAULT FALSE,
+    has_animal_images BOOLEAN DEFAULT FALSE,
+    has_enclosure_images BOOLEAN DEFAULT FALSE,
+    has_emergency_video BOOLEAN DEFAULT FALSE,
+    -- Set while the AI-structured fields are still fallback data
+    ai_pending BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -68,12 +89,41 @@ CREATE TABLE IF NOT EXISTS emergency_alerts (
     observation_id UUID REFERENCES observations(id),
     description TEXT NOT NULL,
     created_by UUID REFERENCES users(id),
+    zoo_id UUID REFERENCES zoos(id),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     resolved BOOLEAN DEFAULT FALSE,
     resolved_at TIMESTAMP WITH TIME ZONE,
     resolved_by UUID REFERENCES users(id)
 );
 
+-- Tombstones for deleted rows, consumed by the delta sync endpoint
+CREATE TABLE IF NOT EXISTS deleted_records (
+    seq BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(50) NOT NULL,
+    record_id UUID NOT NULL,
+    -- Zoo of the deleted row, so clients only learn about deletions in their zoos
+    zoo_id UUID,
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Columns added after the tables were first created; CREATE TABLE IF NOT EXISTS
+-- leaves existing tables alone, so these bring older databases up to date
+ALTER TABLE animals ADD COLUMN IF NOT EXISTS age VARCHAR(50);
+ALTER TABLE animals ADD COLUMN IF NOT EXISTS enclosure VARCHAR(255);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS zoo_id UUID REFERENCES zoos(id);
+ALTER TABLE animals ADD COLUMN IF NOT EXISTS zoo_id UUID REFERENCES zoos(id);
+ALTER TABLE observations ADD COLUMN IF NOT EXISTS zoo_id UUID REFERENCES zoos(id);
+ALTER TABLE emergency_alerts ADD COLUMN IF NOT EXISTS zoo_id UUID REFERENCES zoos(id);
+ALTER TABLE observations ADD COLUMN IF NOT EXISTS transcript TEXT;
+ALTER TABLE observations ADD COLUMN IF NOT EXISTS has_animal_images BOOLEAN DEFAULT FALSE;
+ALTER TABLE observations ADD COLUMN IF NOT EXISTS has_enclosure_images BOOLEAN DEFAULT FALSE;
+ALTER TABLE observations ADD COLUMN IF NOT EXISTS has_emergency_video BOOLEAN DEFAULT FALSE;
+ALTER TABLE observations ADD COLUMN IF NOT EXISTS ai_pending BOOLEAN DEFAULT FALSE;
+ALTER TABLE deleted_records ADD COLUMN IF NOT EXISTS zoo_id UUID;
+-- Animals without a number used to be stored with ''; NULLs never collide on
+-- the (zoo_id, species, number) unique index below
+UPDATE animals SET number = NULL WHERE number = '';
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_animals_assigned_to ON animals(assigned_to);
 CREATE INDEX IF NOT EXISTS idx_observations_animal_id ON observations(animal_id);
@@ -81,6 +131,23 @@ CREATE INDEX IF NOT EXISTS idx_observations_zookeeper_id ON observations(zookeep
 CREATE INDEX IF NOT EXISTS idx_observations_created_at ON observations(created_at);
 CREATE INDEX IF NOT EXISTS idx_emergency_alerts_animal_id ON emergency_alerts(animal_id);
 CREATE INDEX IF NOT EXISTS idx_emergency_alerts_resolved ON emergency_alerts(resolved);
+CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_animals_updated_at ON animals(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_observations_updated_at ON observations(updated_at, id);
+-- Zookeeper-scoped reads: own animals by name, own observations newest first
+CREATE INDEX IF NOT EXISTS idx_animals_assigned_to_name ON animals(assigned_to, name);
+CREATE INDEX IF NOT EXISTS idx_observations_zookeeper_created ON observations(zookeeper_id, created_at DESC);
+-- Tenant-leading indexes keep each zoo's queries on its own slice of the index
+CREATE INDEX IF NOT EXISTS idx_zoos_parent_id ON zoos(parent_id);
+CREATE INDEX IF NOT EXISTS idx_users_zoo_id ON users(zoo_id);
+CREATE INDEX IF NOT EXISTS idx_animals_zoo_assigned_to ON animals(zoo_id, assigned_to);
+-- Bulk imports upsert on this, so re-imports update animals instead of duplicating them
+CREATE UNIQUE INDEX IF NOT EXISTS idx_animals_zoo_species_number ON animals(zoo_id, species, number);
+CREATE INDEX IF NOT EXISTS idx_animals_zoo_enclosure ON animals(zoo_id, enclosure);
+CREATE INDEX IF NOT EXISTS idx_observations_zoo_created ON observations(zoo_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_observations_zoo_zookeeper_created ON observations(zoo_id, zookeeper_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_emergency_alerts_zoo_resolved ON emergency_alerts(zoo_id, resolved);
+CREATE INDEX IF NOT EXISTS idx_deleted_records_zoo_seq ON deleted_records(zoo_id, seq);
 
 -- Create updated_at triggers
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -91,6 +158,10 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+DROP TRIGGER IF EXISTS update_zoos_updated_at ON zoos;
+CREATE TRIGGER update_zoos_updated_at BEFORE UPDATE ON zoos
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 DROP TRIGGER IF EXISTS update_users_updated_at ON users;
 CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -103,11 +174,100 @@ DROP TRIGGER IF EXISTS update_observations_updated_at ON observations;
 CREATE TRIGGER update_observations_updated_at BEFORE UPDATE ON observations
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Record tombstones so offline clients can drop deleted rows. Rows moved to
+-- the observation archive are not deleted for clients, so archive_observations
+-- turns this off for its own transaction
+CREATE OR REPLACE FUNCTION record_deletion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('app.skip_tombstones', true) = 'on' THEN
+        RETURN OLD;
+    END IF;
+    -- Every table with this trigger has a zoo_id column
+    INSERT INTO deleted_records (table_name, record_id, zoo_id) VALUES (TG_TABLE_NAME, OLD.id, OLD.zoo_id);
+    RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS record_users_deletion ON users;
+CREATE TRIGGER record_users_deletion AFTER DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION record_deletion();
+
+DROP TRIGGER IF EXISTS record_animals_deletion ON animals;
+CREATE TRIGGER record_animals_deletion AFTER DELETE ON animals
+    FOR EACH ROW EXECUTE FUNCTION record_deletion();
+
+DROP TRIGGER IF EXISTS record_observations_deletion ON observations;
+CREATE TRIGGER record_observations_deletion AFTER DELETE ON observations
+    FOR EACH ROW EXECUTE FUNCTION record_deletion();
+
+-- Apply a batch of coalesced animal status updates in one statement
+-- (used by the API's write-behind buffer)
+CREATE OR REPLACE FUNCTION bulk_update_animals(updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    UPDATE animals AS a SET
+        last_checked = GREATEST(a.last_checked, COALESCE((u->>'last_checked')::timestamptz, a.last_checked)),
+        health = COALESCE(u->>'health', a.health)
+    FROM jsonb_array_elements(updates) AS u
+    WHERE a.id = (u->>'id')::uuid;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ language 'plpgsql';
+
+-- Per-enclosure totals for a set of zoos, aggregated in the database for the
+-- hierarchy rollups (enclosure -> zoo -> region)
+CREATE OR REPLACE FUNCTION zoo_rollup(zoo_ids UUID[], since TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (
+    zoo_id UUID,
+    enclosure TEXT,
+    animals BIGINT,
+    animals_needing_attention BIGINT,
+    observations BIGINT,
+    emergencies BIGINT
+) AS $$
+    SELECT
+        a.zoo_id,
+        COALESCE(a.enclosure, '') AS enclosure,
+        COUNT(*) AS animals,
+        COUNT(*) FILTER (WHERE a.health IN ('fair', 'poor')) AS animals_needing_attention,
+        COALESCE(SUM(o.observations), 0)::BIGINT AS observations,
+        COALESCE(SUM(o.emergencies), 0)::BIGINT AS emergencies
+    FROM animals a
+    LEFT JOIN (
+        SELECT animal_id, COUNT(*) AS observations, COUNT(*) FILTER (WHERE is_emergency) AS emergencies
+        FROM observations
+        WHERE zoo_id = ANY(zoo_ids) AND created_at >= since
+        GROUP BY animal_id
+    ) o ON o.animal_id = a.id
+    WHERE a.zoo_id = ANY(zoo_ids)
+    GROUP BY a.zoo_id, COALESCE(a.enclosure, '');
+$$ language 'sql' STABLE;
+
+-- Delete observations that the API has copied to the cold archive, without
+-- leaving sync tombstones for them
+CREATE OR REPLACE FUNCTION archive_observations(ids UUID[])
+RETURNS INTEGER AS $$
+DECLARE
+    deleted INTEGER;
+BEGIN
+    PERFORM set_config('app.skip_tombstones', 'on', true);
+    DELETE FROM observations WHERE id = ANY(ids);
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+    RETURN deleted;
+END;
+$$ language 'plpgsql';
+
 -- DISABLE ROW LEVEL SECURITY (required for custom JWT auth)
+ALTER TABLE zoos DISABLE ROW LEVEL SECURITY;
 ALTER TABLE users DISABLE ROW LEVEL SECURITY;
 ALTER TABLE animals DISABLE ROW LEVEL SECURITY;
 ALTER TABLE observations DISABLE ROW LEVEL SECURITY;
 ALTER TABLE emergency_alerts DISABLE ROW LEVEL SECURITY;
+ALTER TABLE deleted_records DISABLE ROW LEVEL SECURITY;
 
 -- Create admin user
 -- Email: admin@zoo.com
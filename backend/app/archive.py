@@ -0,0 +1,407 @@
+import asyncio
+import fcntl
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.database import get_supabase, after_cursor
+from app.cache import invalidate
+from app.export import ALL_COLUMNS, BOOLEAN_COLUMNS, parquet_available
+
+ARCHIVE_DIR = os.environ.get(
+    "ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "archive"),
+)
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_ROWS = int(os.environ.get("ARCHIVE_BATCH_ROWS", "5000"))
+# 0 turns the scheduled job off; runs can still be started from the admin API
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "86400"))
+# A month is compacted into one file once it has this many
+ARCHIVE_COMPACT_MIN_FILES = int(os.environ.get("ARCHIVE_COMPACT_MIN_FILES", "4"))
+
+ARCHIVE_COLUMNS = ALL_COLUMNS + ["zoo_id", "audio_url", "images", "video_url", "transcript", "updated_at"]
+LIST_COLUMNS = {"images"}
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        (
+            column,
+            pa.bool_() if column in BOOLEAN_COLUMNS
+            else pa.list_(pa.string()) if column in LIST_COLUMNS
+            else pa.string(),
+        )
+        for column in ARCHIVE_COLUMNS
+    ])
+
+
+def _archive_value(column: str, value):
+    if value is None or column in BOOLEAN_COLUMNS:
+        return value
+    if column in LIST_COLUMNS:
+        return [str(item) for item in value]
+    return str(value)
+
+
+def _sort_key(row: dict) -> tuple:
+    return (row.get("created_at") or "", row.get("id") or "")
+
+
+def _dedupe(rows: list) -> list:
+    """Rows with one copy per id, the last written winning, sorted by (created_at, id)."""
+    return sorted({row["id"]: row for row in rows}.values(), key=_sort_key)
+
+
+def merge_pages(*sources, page_size: int = 1000):
+    """Merge page streams that are each in (created_at, id) order, dropping repeated ids."""
+    page, last_id = [], None
+    for row in heapq.merge(*((row for page in source for row in page) for source in sources), key=_sort_key):
+        if row["id"] == last_id:
+            continue
+        last_id = row["id"]
+        page.append(row)
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+class ObservationArchive:
+    """Cold tier for old observations.
+
+    Observations older than ``after_days`` are moved out of the database into
+    zstd-compressed Parquet files, one directory per month of ``created_at``.
+    Transcripts and media references (``images``, ``video_url``,
+    ``audio_url``) move with them; the media files themselves stay where
+    they are. A JSON manifest lists each file with its row count, time range
+    and zoos, so reads only open the files that can match.
+
+    Archived observations stay searchable and are not deleted for offline
+    clients: the rows are removed through the ``archive_observations``
+    database function, which leaves no sync tombstones.
+
+    Observations referenced by emergency alerts stay in the database. Every
+    archive run writes its rows and the manifest before it deletes them, so
+    a crash can only leave a row in both tiers; readers and compaction
+    drop such duplicates. Runs and compactions take a file lock, so only
+    one process changes the archive at a time.
+    """
+
+    def __init__(self, base_dir: str, after_days: int, batch_rows: int, interval_seconds: float):
+        self.base_dir = base_dir
+        self.after_days = after_days
+        self.batch_rows = batch_rows
+        self.interval_seconds = interval_seconds
+        self.manifest_path = os.path.join(base_dir, "manifest.json")
+        self._lock = threading.Lock()
+        self._manifest = {"files": []}
+        self._manifest_mtime = None
+        self._task = None
+        self.last_run = None
+        self.last_compaction = None
+
+    # ----------------------------
+    # Manifest
+    # ----------------------------
+    def _load_manifest(self) -> dict:
+        """Current manifest, re-read when another process has replaced it."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            with open(self.manifest_path) as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def _save_manifest(self, manifest: dict):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest = manifest
+        self._manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+
+    @contextmanager
+    def _exclusive(self):
+        """Held while changing the archive, against other threads and other processes."""
+        os.makedirs(self.base_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.base_dir, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ----------------------------
+    # Files
+    # ----------------------------
+    def _write_file(self, month: str, rows: list) -> dict:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = _dedupe(rows)
+        relative_path = os.path.join(month, f"{uuid.uuid4().hex}.parquet")
+        path = os.path.join(self.base_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pydict(
+            {column: [_archive_value(column, row.get(column)) for row in rows] for column in ARCHIVE_COLUMNS},
+            schema=_schema(),
+        )
+        pq.write_table(table, path, compression="zstd")
+        return {
+            "path": relative_path,
+            "month": month,
+            "rows": len(rows),
+            "bytes": os.path.getsize(path),
+            "min_created_at": rows[0]["created_at"],
+            "max_created_at": rows[-1]["created_at"],
+            "zoo_ids": sorted({row.get("zoo_id") or "" for row in rows}),
+        }
+
+    def _read_file(self, entry: dict, filters: list) -> list:
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.base_dir, entry["path"])
+        return pq.read_table(path, filters=filters or None).to_pylist()
+
+    def _read_month(self, entries: list, filters: list) -> list:
+        try:
+            rows = [row for entry in entries for row in self._read_file(entry, filters)]
+        except FileNotFoundError:
+            # Compacted away since the manifest was read; read the new file instead
+            month = entries[0]["month"]
+            entries = [e for e in self._load_manifest()["files"] if e["month"] == month]
+            rows = [row for entry in entries for row in self._read_file(entry, filters)]
+        return _dedupe(rows)
+
+    def _months(self, start: str = "", end: str = "", zoo_ids: Optional[tuple] = None) -> dict:
+        """Manifest entries that can hold matching rows, by month."""
+        allowed = set(zoo_ids) if zoo_ids is not None else None
+        months: dict[str, list] = {}
+        for entry in self._load_manifest()["files"]:
+            if start and entry["max_created_at"] < start:
+                continue
+            if end and entry["min_created_at"] >= end:
+                continue
+            if allowed is not None and not allowed.intersection(entry["zoo_ids"]):
+                continue
+            months.setdefault(entry["month"], []).append(entry)
+        return months
+
+    @staticmethod
+    def _filters(start: str, end: str, animal_id: str, zoo_ids: Optional[tuple], zookeeper_id: Optional[str]) -> list:
+        filters = []
+        if start:
+            filters.append(("created_at", ">=", start))
+        if end:
+            filters.append(("created_at", "<", end))
+        if animal_id:
+            filters.append(("animal_id", "=", animal_id))
+        if zoo_ids is not None:
+            filters.append(("zoo_id", "in", list(zoo_ids)))
+        if zookeeper_id is not None:
+            filters.append(("zookeeper_id", "=", zookeeper_id))
+        return filters
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def newest(self, zoo_ids: Optional[tuple] = None) -> Optional[str]:
+        """``created_at`` of the newest archived observation in ``zoo_ids``, if any."""
+        months = self._months(zoo_ids=zoo_ids)
+        return max((entry["max_created_at"] for entries in months.values() for entry in entries), default=None)
+
+    def lookup(self, ids: list, months: set, zoo_ids: Optional[tuple] = None,
+               zookeeper_id: Optional[str] = None) -> list:
+        """Archived observations with these ids, read only from ``months`` ("YYYY-MM")."""
+        if not ids or not parquet_available():
+            return []
+        filters = self._filters("", "", "", zoo_ids, zookeeper_id) + [("id", "in", list(ids))]
+        candidates = self._months(zoo_ids=zoo_ids)
+        return [row for month in sorted(months & candidates.keys()) for row in self._read_month(candidates[month], filters)]
+
+    def recent(self, limit: int, animal_id: str = "", zoo_ids: Optional[tuple] = None,
+               zookeeper_id: Optional[str] = None) -> list:
+        """Up to ``limit`` archived observations, newest first."""
+        if not parquet_available():
+            return []
+        filters = self._filters("", "", animal_id, zoo_ids, zookeeper_id)
+        rows = []
+        months = self._months(zoo_ids=zoo_ids)
+        # Months never overlap, so the newest months hold the newest rows
+        for month in sorted(months, reverse=True):
+            rows.extend(reversed(self._read_month(months[month], filters)))
+            if len(rows) >= limit:
+                break
+        return rows[:limit]
+
+    def iter_pages(self, start: str = "", end: str = "", animal_id: str = "",
+                   zoo_ids: Optional[tuple] = None, page_size: int = 1000):
+        """Yield pages of archived observations in (created_at, id) order, one month at a time."""
+        if not parquet_available():
+            return
+        filters = self._filters(start, end, animal_id, zoo_ids, None)
+        months = self._months(start, end, zoo_ids)
+        for month in sorted(months):
+            rows = self._read_month(months[month], filters)
+            for offset in range(0, len(rows), page_size):
+                yield rows[offset:offset + page_size]
+
+    # ----------------------------
+    # Archiving
+    # ----------------------------
+    def _pinned(self, supabase, ids: list) -> set:
+        """Observations an emergency alert points at; they stay in the database."""
+        result = supabase.table("emergency_alerts").select("observation_id").in_("observation_id", ids).execute()
+        return {row["observation_id"] for row in result.data or []}
+
+    def run(self) -> dict:
+        """Move observations older than ``after_days`` into the archive."""
+        supabase = get_supabase()
+        if not supabase:
+            return {"skipped": "Database not configured"}
+        if not parquet_available():
+            return {"skipped": "Archiving needs the pyarrow package"}
+
+        cutoff = (datetime.utcnow() - timedelta(days=self.after_days)).isoformat()
+        started = time.time()
+        archived = pinned = 0
+        zoo_ids = set()
+        with self._exclusive():
+            last_created_at, last_id = "", ""
+            while True:
+                query = supabase.table("observations").select("*").lt("created_at", cutoff)
+                query = after_cursor(query, "created_at", last_created_at, last_id)
+                rows = query.order("created_at").order("id").limit(self.batch_rows).execute().data or []
+                if not rows:
+                    break
+                last_created_at, last_id = rows[-1]["created_at"], rows[-1]["id"]
+
+                keep = self._pinned(supabase, [row["id"] for row in rows])
+                moving = [row for row in rows if row["id"] not in keep]
+                pinned += len(rows) - len(moving)
+                if moving:
+                    by_month: dict[str, list] = {}
+                    for row in moving:
+                        by_month.setdefault(row["created_at"][:7], []).append(row)
+                    manifest = self._load_manifest()
+                    entries = [self._write_file(month, month_rows) for month, month_rows in by_month.items()]
+                    self._save_manifest({
+                        **manifest,
+                        "files": manifest["files"] + entries,
+                        "archived_rows": manifest.get("archived_rows", 0) + len(moving),
+                    })
+
+                    supabase.rpc("archive_observations", {"ids": [row["id"] for row in moving]}).execute()
+                    archived += len(moving)
+                    zoo_ids.update(row.get("zoo_id") for row in moving)
+                if len(rows) < self.batch_rows:
+                    break
+
+        for zoo_id in zoo_ids:
+            invalidate("observations", zoo_id=zoo_id)
+        self.last_run = {
+            "at": started,
+            "cutoff": cutoff,
+            "archived": archived,
+            "pinned": pinned,
+            "seconds": round(time.time() - started, 3),
+        }
+        return self.last_run
+
+    def compact(self, min_files: int = 2) -> dict:
+        """Rewrite each month with at least ``min_files`` files as one file, dropping duplicates."""
+        if not parquet_available():
+            return {"skipped": "Archiving needs the pyarrow package"}
+
+        started = time.time()
+        compacted_months = removed_files = 0
+        with self._exclusive():
+            manifest = self._load_manifest()
+            months: dict[str, list] = {}
+            for entry in manifest["files"]:
+                months.setdefault(entry["month"], []).append(entry)
+            for month, entries in sorted(months.items()):
+                if len(entries) < min_files:
+                    continue
+                merged = self._write_file(month, [row for entry in entries for row in self._read_file(entry, [])])
+                replaced = {entry["path"] for entry in entries}
+                manifest = {
+                    **manifest,
+                    "files": [e for e in manifest["files"] if e["path"] not in replaced] + [merged],
+                    "archived_rows": manifest.get("archived_rows", 0)
+                    - sum(e["rows"] for e in entries) + merged["rows"],
+                }
+                self._save_manifest(manifest)
+                # Only unlinked once the manifest no longer lists them
+                for path in replaced:
+                    os.remove(os.path.join(self.base_dir, path))
+                compacted_months += 1
+                removed_files += len(entries) - 1
+
+        self.last_compaction = {
+            "at": started,
+            "months": compacted_months,
+            "files_removed": removed_files,
+            "seconds": round(time.time() - started, 3),
+        }
+        return self.last_compaction
+
+    # ----------------------------
+    # Scheduling
+    # ----------------------------
+    async def _run_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await run_in_threadpool(self.run)
+                await run_in_threadpool(self.compact, ARCHIVE_COMPACT_MIN_FILES)
+            except Exception as e:
+                print(f"Observation archive run failed: {e}")
+
+    def start(self):
+        if self._task is None and self.interval_seconds > 0:
+            self._task = asyncio.ensure_future(self._run_periodically())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        entries = self._load_manifest()["files"]
+        months: dict[str, dict] = {}
+        for entry in entries:
+            month = months.setdefault(entry["month"], {"files": 0, "rows": 0, "bytes": 0})
+            month["files"] += 1
+            month["rows"] += entry["rows"]
+            month["bytes"] += entry["bytes"]
+        return {
+            "after_days": self.after_days,
+            "files": len(entries),
+            "rows": sum(entry["rows"] for entry in entries),
+            "bytes": sum(entry["bytes"] for entry in entries),
+            "oldest": min((entry["min_created_at"] for entry in entries), default=None),
+            "newest": max((entry["max_created_at"] for entry in entries), default=None),
+            "months": dict(sorted(months.items())),
+            "last_run": self.last_run,
+            "last_compaction": self.last_compaction,
+        }
+
+
+observation_archive = ObservationArchive(
+    ARCHIVE_DIR, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_ROWS, ARCHIVE_INTERVAL_SECONDS
+)
@@ -0,0 +1,221 @@
+import csv
+import io
+from typing import Optional
+from pydantic import ValidationError
+from app.models.schemas import AnimalCreate
+
+MAX_REPORTED_ERRORS = 1000
+# Unique index an imported row is matched on, so re-imports update animals
+# however they were created instead of duplicating them
+ANIMAL_KEY_COLUMNS = ("zoo_id", "species", "number")
+EXISTING_PAGE_SIZE = 1000
+
+ANIMAL_COLUMNS = set(AnimalCreate.model_fields)
+
+
+class ImportFormatError(Exception):
+    """Raised when the uploaded file cannot be read as CSV or XLSX."""
+
+
+def _clean_header(value) -> str:
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.reader(text)
+        headers = [_clean_header(h) for h in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield row_number, dict(zip(headers, values))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Could not read CSV: {e}")
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("XLSX import needs the openpyxl package; upload a CSV instead")
+
+    # read_only mode streams rows from the zip instead of loading the whole sheet
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"Could not read XLSX: {e}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_clean_header(h) for h in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if any(v not in (None, "") for v in values):
+                yield row_number, dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename: str):
+    """Yield (row number, {column: value}) from a CSV or XLSX upload, one row at a time."""
+    name = (filename or "").lower()
+    if name.endswith(".xlsx"):
+        return _iter_xlsx(fileobj)
+    if name.endswith(".csv") or not name:
+        return _iter_csv(fileobj)
+    raise ImportFormatError("Only .csv and .xlsx files can be imported")
+
+
+def _to_record(raw: dict, default_zoo_id: Optional[str]) -> dict:
+    values = {}
+    for column in ANIMAL_COLUMNS:
+        value = raw.get(column)
+        if value is not None and not isinstance(value, str):
+            value = str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+        values[column] = value.strip() if value and value.strip() else None
+    animal = AnimalCreate(**values)
+    # Blank cells are left out so they never wipe what an existing animal has;
+    # health, last_checked and created_at are left to the column defaults
+    record = {column: value for column, value in animal.model_dump().items() if value is not None}
+    record["zoo_id"] = animal.zoo_id or default_zoo_id
+    return record
+
+
+def _key(record: dict) -> Optional[tuple]:
+    """The record's unique key, or ``None`` when it cannot match an existing animal."""
+    if not record.get("number") or not record.get("zoo_id"):
+        return None
+    return tuple(record.get(column) for column in ANIMAL_KEY_COLUMNS)
+
+
+class AnimalImporter:
+    """Validate and upsert animals in fixed-size batches while rows stream in.
+
+    Rows are matched to existing animals on zoo, species and number. Rows
+    without a number, or without a zoo, always create a new animal, since
+    the database treats their missing keys as distinct. New animals without
+    an ``assigned_to`` are assigned to the importing user; existing ones
+    keep theirs.
+    """
+
+    def __init__(
+        self,
+        supabase,
+        default_assigned_to: str,
+        batch_size: int = 500,
+        zoo_id: Optional[str] = None,
+        allowed_zoo_ids: Optional[tuple] = None
+    ):
+        self.supabase = supabase
+        self.default_assigned_to = default_assigned_to
+        self.batch_size = batch_size
+        self.zoo_id = zoo_id
+        # None allows any zoo; otherwise rows for other zoos are rejected
+        self.allowed_zoo_ids = allowed_zoo_ids
+        # Zoos the import wrote to, so callers know which caches to refresh
+        self.zoo_ids = set()
+        self.total_rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.aborted = None
+        self._batch: dict = {}
+
+    def _error(self, row_number: int, messages: list):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    def add(self, row_number: int, raw: dict):
+        self.total_rows += 1
+        try:
+            record = _to_record(raw, self.zoo_id)
+        except ValidationError as e:
+            self._error(row_number, [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()])
+            return
+        if self.allowed_zoo_ids is not None and record["zoo_id"] not in self.allowed_zoo_ids:
+            self._error(row_number, ["zoo_id: not one of your zoos"])
+            return
+        self.zoo_ids.add(record["zoo_id"])
+        # A later row for the same animal replaces an earlier one in the batch,
+        # since one upsert cannot touch a row twice
+        self._batch[_key(record) or ("row", row_number)] = (row_number, record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def _existing_keys(self, keys: set) -> set:
+        numbers = sorted({key[2] for key in keys})
+        species = sorted({key[1] for key in keys})
+        existing = set()
+        start = 0
+        while True:
+            rows = (
+                self.supabase.table("animals").select(", ".join(ANIMAL_KEY_COLUMNS))
+                .in_("number", numbers).in_("species", species)
+                .range(start, start + EXISTING_PAGE_SIZE - 1).execute().data or []
+            )
+            existing.update(_key(row) for row in rows)
+            if len(rows) < EXISTING_PAGE_SIZE:
+                return existing & keys
+            start += EXISTING_PAGE_SIZE
+
+    def _upsert(self, batch: list):
+        try:
+            self.supabase.table("animals").upsert(
+                [record for _, record in batch], on_conflict=",".join(ANIMAL_KEY_COLUMNS)
+            ).execute()
+            self.imported += len(batch)
+            return
+        except Exception:
+            pass
+        # Retry one by one so a single bad row does not sink the whole batch
+        for row_number, record in batch:
+            try:
+                self.supabase.table("animals").upsert(record, on_conflict=",".join(ANIMAL_KEY_COLUMNS)).execute()
+                self.imported += 1
+            except Exception as e:
+                self._error(row_number, [str(e)])
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch = list(self._batch.values())
+        self._batch = {}
+        try:
+            keys = {key for key in (_key(record) for _, record in batch) if key}
+            existing = self._existing_keys(keys) if keys else set()
+        except Exception as e:
+            for row_number, _ in batch:
+                self._error(row_number, [f"Could not check for existing animals: {e}"])
+            return
+        for _, record in batch:
+            if "assigned_to" not in record and _key(record) not in existing:
+                record["assigned_to"] = self.default_assigned_to
+
+        # Rows are sent in groups with the same columns: in a mixed batch a
+        # column missing from one row would be written as NULL over its value
+        groups: dict[tuple, list] = {}
+        for row_number, record in batch:
+            groups.setdefault(tuple(sorted(record)), []).append((row_number, record))
+        for group in groups.values():
+            self._upsert(group)
+
+    def run(self, rows) -> dict:
+        try:
+            for row_number, raw in rows:
+                self.add(row_number, raw)
+        except ImportFormatError as e:
+            # Rows before the unreadable part are still written and reported
+            self.aborted = str(e)
+        self.flush()
+        return self.report()
+
+    def report(self) -> dict:
+        return {
+            "aborted": self.aborted,
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
@@ -0,0 +1,121 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.resilience import SingleFlight
+from app.worker_bus import worker_bus
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.environ.get("DASHBOARD_CACHE_TTL_SECONDS", "30"))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", "1000"))
+
+# ----------------------------
+# Table versions
+# ----------------------------
+# Bumped by every write a router makes, so anything computed from a table can
+# tell whether it is stale. Each write is also sent to the other workers over
+# the worker bus, which bump their own versions within a poll interval.
+#
+# Versions are kept per (table, zoo), so a write in one zoo leaves the cached
+# views of every other zoo valid. ALL_ZOOS counts every write to a table and
+# backs views across all zoos; UNKNOWN_ZOO counts writes whose zoo is not
+# known, which every zoo's views must treat as their own.
+ALL_ZOOS = "*"
+UNKNOWN_ZOO = ""
+_table_versions: dict[tuple, int] = {}
+
+
+def table_versions(*tables: str, zoo_ids: Optional[tuple] = None) -> tuple:
+    """Current versions of ``tables``, as seen by a view of ``zoo_ids`` (``None`` for all zoos)."""
+    if zoo_ids is None:
+        return tuple(_table_versions.get((table, ALL_ZOOS), 0) for table in tables)
+    return tuple(
+        _table_versions.get((table, zoo), 0) for table in tables for zoo in (UNKNOWN_ZOO, *zoo_ids)
+    )
+
+
+def _bump(tables, zoo_id: Optional[str]):
+    for table in tables:
+        for key in ((table, ALL_ZOOS), (table, zoo_id or UNKNOWN_ZOO)):
+            _table_versions[key] = _table_versions.get(key, 0) + 1
+
+
+def invalidate(*tables: str, zoo_id: Optional[str] = None):
+    _bump(tables, zoo_id)
+    worker_bus.publish("invalidate", {"tables": tables, "zoo_id": zoo_id})
+
+
+worker_bus.subscribe("invalidate", lambda event: _bump(event["tables"], event["zoo_id"]))
+
+
+class VersionedCache:
+    """Short-lived cache of values computed from database tables.
+
+    An entry is served only while it is younger than ``ttl`` and none of the
+    tables it was computed from has been written since. Entries are kept in
+    one LRU partition per set of zoos, each holding up to ``max_entries``, so
+    a busy zoo cannot evict everyone else's entries. Concurrent misses for the
+    same key share one computation.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # partition -> key -> (table versions, expiry, value)
+        self._partitions: dict[str, OrderedDict] = {}
+        self._single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _partition(zoo_ids: Optional[tuple]) -> str:
+        return ALL_ZOOS if zoo_ids is None else ",".join(zoo_ids)
+
+    def get(self, key: str, tables: tuple, zoo_ids: Optional[tuple] = None):
+        entries = self._partitions.get(self._partition(zoo_ids))
+        entry = entries.get(key) if entries is not None else None
+        if entry is None or entry[0] != table_versions(*tables, zoo_ids=zoo_ids) or entry[1] <= time.monotonic():
+            return None
+        entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key: str, versions: tuple, value, zoo_ids: Optional[tuple] = None):
+        entries = self._partitions.setdefault(self._partition(zoo_ids), OrderedDict())
+        entries[key] = (versions, time.monotonic() + self.ttl, value)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    async def get_or_compute(self, key: str, tables: tuple, fn, *args, zoo_ids: Optional[tuple] = None):
+        """Cached value for ``key``, or ``fn(*args)`` run in the thread pool and stored.
+
+        ``zoo_ids`` are the zoos the value covers (``None`` for all of them);
+        only writes to those zoos make it stale.
+        """
+        value = self.get(key, tables, zoo_ids)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        return await self._single_flight.do(
+            f"{self._partition(zoo_ids)}|{key}", self._compute, key, tables, zoo_ids, fn, *args
+        )
+
+    async def _compute(self, key: str, tables: tuple, zoo_ids: Optional[tuple], fn, *args):
+        # Versions are read before computing, so a write that lands meanwhile
+        # leaves the stored entry already stale
+        versions = table_versions(*tables, zoo_ids=zoo_ids)
+        value = await run_in_threadpool(fn, *args)
+        self.set(key, versions, value, zoo_ids)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "partitions": len(self._partitions),
+            "entries": sum(len(entries) for entries in self._partitions.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+dashboard_cache = VersionedCache(DASHBOARD_CACHE_TTL_SECONDS, DASHBOARD_CACHE_MAX_ENTRIES)
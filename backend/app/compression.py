@@ -0,0 +1,141 @@
+import gzip
+import json
+import os
+from typing import Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+from app.cache import VersionedCache
+
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+# Precompressed list bodies are cached longer than dashboards: they are
+# rebuilt as soon as a write in this process touches their table anyway
+LIST_CACHE_TTL_SECONDS = float(os.environ.get("LIST_CACHE_TTL_SECONDS", "60"))
+LIST_CACHE_MAX_ENTRIES = int(os.environ.get("LIST_CACHE_MAX_ENTRIES", "500"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+def negotiate_encoding(accept_encoding: str):
+    """Best encoding the client accepts: brotli, then gzip, else ``None``."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress responses with the client's preferred encoding.
+
+    Only whole bodies of ``minimum_size`` bytes or more are compressed;
+    streamed responses (exports, media, server-sent events) and responses
+    that already carry a ``Content-Encoding`` pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                or start_message["status"] in (204, 206, 304)
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+# ----------------------------
+# Precompressed list responses
+# ----------------------------
+list_response_cache = VersionedCache(LIST_CACHE_TTL_SECONDS, LIST_CACHE_MAX_ENTRIES)
+
+
+def _encode_list(encoding, fn, *args) -> tuple:
+    """Serialized body and the encoding it ended up in (``None`` when too small to compress)."""
+    body = json.dumps(jsonable_encoder(fn(*args)), separators=(",", ":")).encode("utf-8")
+    if encoding and len(body) >= COMPRESSION_MIN_BYTES:
+        return compress(body, encoding), encoding
+    return body, None
+
+
+async def cached_list_response(
+    request: Request, key: str, tables: tuple, fn, *args, zoo_ids: Optional[tuple] = None
+) -> Response:
+    """JSON response for a list endpoint, served from cached, already-compressed bytes.
+
+    ``fn(*args)`` is run in the thread pool on a miss. ``key`` must identify
+    everything the result depends on besides the ``tables`` it reads and the
+    ``zoo_ids`` it covers, such as query parameters and the caller's scope.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    body, body_encoding = await list_response_cache.get_or_compute(
+        f"{key}:{encoding or 'identity'}", tables, _encode_list, encoding, fn, *args, zoo_ids=zoo_ids
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if body_encoding:
+        headers["Content-Encoding"] = body_encoding
+    return Response(content=body, media_type="application/json", headers=headers)
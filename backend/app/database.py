@@ -6,6 +6,9 @@ url: str = os.environ.get("SUPABASE_URL", "")
 key: str = os.environ.get("SUPABASE_KEY", "")
 
 supabase: Optional[Client] = None
+# Separate client for the emergency lane so SOS writes never queue for a
+# connection behind bulk reads
+priority_supabase: Optional[Client] = None
 
 def get_supabase() -> Client:
     global supabase
@@ -13,5 +16,22 @@ def get_supabase() -> Client:
         supabase = create_client(url, key)
     return supabase
 
+def get_priority_supabase() -> Client:
+    global priority_supabase
+    if priority_supabase is None and url and key:
+        priority_supabase = create_client(url, key)
+    return priority_supabase
+
 def init_db():
     return get_supabase()
+
+def after_cursor(query, column: str, value: str, row_id: str = ""):
+    """Keyset filter for rows that sort after (column, id) = (value, row_id).
+
+    Ties on ``column`` are broken by ``id`` so paging never skips or repeats rows.
+    """
+    if not value:
+        return query
+    if not row_id:
+        return query.gt(column, value)
+    return query.or_(f'{column}.gt."{value}",and({column}.eq."{value}",id.gt.{row_id})')
@@ -0,0 +1,273 @@
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from app.database import get_priority_supabase
+from app.cache import invalidate
+from app.worker_bus import worker_bus
+
+EMERGENCY_WAL_PATH = os.environ.get(
+    "EMERGENCY_WAL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "emergency_alerts.wal"),
+)
+EMERGENCY_WORKERS = int(os.environ.get("EMERGENCY_WORKERS", "2"))
+# How often alerts whose database write failed are tried again
+EMERGENCY_RETRY_SECONDS = float(os.environ.get("EMERGENCY_RETRY_SECONDS", "15"))
+# How long an SOS waits to look up its animal's zoo before going out with the sender's
+EMERGENCY_ZOO_LOOKUP_MS = float(os.environ.get("EMERGENCY_ZOO_LOOKUP_MS", "30"))
+# Animals can move zoo, so their zoo is only remembered this long
+ANIMAL_ZOO_TTL_SECONDS = 300
+ANIMAL_ZOO_MAX = 10000
+WAL_COMPACT_BYTES = 1024 * 1024
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EmergencyLane:
+    """Dedicated path for SOS alerts that never waits behind AI or bulk work.
+
+    Alerts are appended and fsynced to a local write-ahead log before they are
+    acknowledged, pushed straight to vets subscribed to this worker and over
+    the worker bus to those subscribed to the others, and written to the
+    database afterwards. Blocking work runs on executors reserved for this
+    lane, and the database write uses its own client, so saturated shared
+    thread pools or connection pools cannot delay an SOS.
+
+    An alert about an animal belongs to the animal's zoo. The zoo is looked
+    up on this lane's client, or taken from recent lookups and observations;
+    if that takes longer than ``EMERGENCY_ZOO_LOOKUP_MS`` the alert is sent
+    with the sender's zoo and corrected before it is written.
+
+    Each process keeps its own log (``<path>.<pid>``); on startup a process
+    adopts the logs of processes that are no longer running. Alerts whose
+    database write failed are retried every ``retry_seconds`` while running.
+    """
+
+    def __init__(self, wal_base_path: str, workers: int, retry_seconds: float = EMERGENCY_RETRY_SECONDS):
+        self.wal_base_path = wal_base_path
+        self.retry_seconds = retry_seconds
+        self._wal_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emergency-wal")
+        self._db_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="emergency-db")
+        self._wal_lock = threading.Lock()
+        self._pending: dict[str, dict] = {}
+        self._in_flight: set[str] = set()
+        self._retry_task = None
+        self.retried_writes = 0
+        # animal id -> (zoo id, expiry)
+        self._animal_zoos: OrderedDict[str, tuple] = OrderedDict()
+        # queue -> zoos whose alerts it receives (None for every zoo)
+        self._subscribers: dict[asyncio.Queue, Optional[frozenset]] = {}
+
+    @property
+    def wal_path(self) -> str:
+        # Resolved per call: with a preloading server this module is imported
+        # before the worker processes fork
+        return f"{self.wal_base_path}.{os.getpid()}"
+
+    # ----------------------------
+    # Write-ahead log
+    # ----------------------------
+    def _append_wal(self, entry: dict):
+        with self._wal_lock:
+            os.makedirs(os.path.dirname(self.wal_path), exist_ok=True)
+            with open(self.wal_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _compact_wal(self):
+        """Rewrite the log with only alerts that are not in the database yet."""
+        with self._wal_lock:
+            os.makedirs(os.path.dirname(self.wal_path), exist_ok=True)
+            tmp_path = self.wal_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for alert in list(self._pending.values()):
+                    f.write(json.dumps({"op": "alert", "alert": alert}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.wal_path)
+
+    def _load_wal(self, path: str):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+                if entry.get("op") == "alert":
+                    self._pending[entry["alert"]["id"]] = entry["alert"]
+                elif entry.get("op") == "persisted":
+                    self._pending.pop(entry["id"], None)
+
+    # ----------------------------
+    # Animal zoos
+    # ----------------------------
+    def remember_animal_zoo(self, animal_id: str, zoo_id: Optional[str]):
+        self._animal_zoos[animal_id] = (zoo_id, time.monotonic() + ANIMAL_ZOO_TTL_SECONDS)
+        self._animal_zoos.move_to_end(animal_id)
+        while len(self._animal_zoos) > ANIMAL_ZOO_MAX:
+            self._animal_zoos.popitem(last=False)
+
+    def _known_animal_zoo(self, animal_id: str):
+        """``(True, zoo id)`` for a recently seen animal, else ``(False, None)``."""
+        entry = self._animal_zoos.get(animal_id)
+        if entry is None or entry[1] <= time.monotonic():
+            return False, None
+        return True, entry[0]
+
+    def _lookup_animal_zoo(self, animal_id: str):
+        """The animal's zoo from the database; ``(False, None)`` when it cannot be told."""
+        known, zoo_id = self._known_animal_zoo(animal_id)
+        if known:
+            return known, zoo_id
+        supabase = get_priority_supabase()
+        if not supabase:
+            return False, None
+        result = supabase.table("animals").select("zoo_id").eq("id", animal_id).execute()
+        if not result.data:
+            return False, None
+        self.remember_animal_zoo(animal_id, result.data[0].get("zoo_id"))
+        return True, result.data[0].get("zoo_id")
+
+    async def _resolve_zoo(self, alert: dict):
+        if not alert.get("animal_id"):
+            return
+        known, zoo_id = self._known_animal_zoo(alert["animal_id"])
+        if not known:
+            lookup = asyncio.get_running_loop().run_in_executor(
+                self._db_executor, self._lookup_animal_zoo, alert["animal_id"]
+            )
+            try:
+                known, zoo_id = await asyncio.wait_for(lookup, timeout=EMERGENCY_ZOO_LOOKUP_MS / 1000)
+            except Exception as e:
+                print(f"Zoo of animal {alert['animal_id']} not resolved in time, using the sender's: {e!r}")
+                return
+        if known:
+            alert["zoo_id"] = zoo_id
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def _persist(self, alert: dict):
+        supabase = get_priority_supabase()
+        if not supabase or alert["id"] in self._in_flight:
+            return
+        self._in_flight.add(alert["id"])
+        try:
+            if alert.get("animal_id"):
+                known, zoo_id = self._lookup_animal_zoo(alert["animal_id"])
+                if known:
+                    alert["zoo_id"] = zoo_id
+            supabase.table("emergency_alerts").upsert(alert).execute()
+        except Exception as e:
+            print(f"Error saving emergency alert {alert['id']}, kept in WAL: {e}")
+            return
+        finally:
+            self._in_flight.discard(alert["id"])
+        invalidate("emergency_alerts", zoo_id=alert.get("zoo_id"))
+        self._pending.pop(alert["id"], None)
+        self._append_wal({"op": "persisted", "id": alert["id"]})
+        if not self._pending and os.path.getsize(self.wal_path) > WAL_COMPACT_BYTES:
+            self._compact_wal()
+
+    def recover(self):
+        """Replay alerts that were acknowledged but never reached the database."""
+        for path in glob.glob(f"{glob.escape(self.wal_base_path)}.*"):
+            suffix = path[len(self.wal_base_path) + 1:]
+            if not suffix.isdigit() or (int(suffix) != os.getpid() and _process_alive(int(suffix))):
+                continue
+            # Claim the file first so two workers never replay the same log
+            claimed = f"{path}.recovering.{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            self._load_wal(claimed)
+            self._compact_wal()
+            os.remove(claimed)
+        self._retry_pending()
+
+    def _retry_pending(self):
+        for alert in list(self._pending.values()):
+            if alert["id"] not in self._in_flight:
+                self._db_executor.submit(self._persist, alert)
+
+    async def _retry_periodically(self):
+        while True:
+            await asyncio.sleep(self.retry_seconds)
+            if self._pending:
+                self.retried_writes += len(self._pending)
+                self._retry_pending()
+
+    def start(self):
+        if self._retry_task is None:
+            self._retry_task = asyncio.ensure_future(self._retry_periodically())
+
+    def stop(self):
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            self._retry_task = None
+
+    # ----------------------------
+    # Fan-out
+    # ----------------------------
+    def subscribe(self, zoo_ids: Optional[tuple] = None) -> asyncio.Queue:
+        """Queue of new alerts from ``zoo_ids`` (``None`` for every zoo)."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers[queue] = frozenset(zoo_ids) if zoo_ids is not None else None
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def _publish(self, alert: dict):
+        for queue, zoo_ids in list(self._subscribers.items()):
+            if zoo_ids is not None and alert.get("zoo_id") not in zoo_ids:
+                continue
+            try:
+                queue.put_nowait(alert)
+            except asyncio.QueueFull:
+                pass  # a stalled client must not hold up everyone else
+
+    async def submit(self, alert: dict) -> dict:
+        """Durably record an alert, notify subscribers and queue the database write."""
+        loop = asyncio.get_running_loop()
+        await self._resolve_zoo(alert)
+        # Tracked before the append so a concurrent compaction cannot drop it
+        self._pending[alert["id"]] = alert
+        try:
+            await loop.run_in_executor(self._wal_executor, self._append_wal, {"op": "alert", "alert": alert})
+        except Exception:
+            self._pending.pop(alert["id"], None)
+            raise
+        self._publish(alert)
+        worker_bus.publish("emergency", alert)
+        loop.run_in_executor(self._db_executor, self._persist, alert)
+        return alert
+
+    def stats(self) -> dict:
+        return {
+            "pending_writes": len(self._pending),
+            "retried_writes": self.retried_writes,
+            "subscribers": len(self._subscribers),
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+emergency_lane = EmergencyLane(EMERGENCY_WAL_PATH, EMERGENCY_WORKERS)
+
+
+worker_bus.subscribe("emergency", emergency_lane._publish)
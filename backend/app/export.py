@@ -0,0 +1,126 @@
+import csv
+import io
+from typing import Optional
+from app.database import after_cursor
+from app.models.zoo_model import AnimalMonitoringData
+
+BASE_COLUMNS = ["id", "animal_id", "zookeeper_id", "created_at"]
+MONITORING_COLUMNS = list(AnimalMonitoringData.model_fields)
+EXTRA_COLUMNS = ["is_emergency", "vet_comments"]
+ALL_COLUMNS = BASE_COLUMNS + MONITORING_COLUMNS + EXTRA_COLUMNS
+
+# Monthly registers officers file, each the string field that backs it
+REGISTERS = {
+    "health_monitoring": "daily_animal_health_monitoring",
+    "feeding_chart": "carnivorous_animal_feeding_chart",
+    "medicine_stock": "medicine_stock_register",
+    "wildlife_monitoring": "daily_wildlife_monitoring",
+}
+
+BOOLEAN_COLUMNS = {
+    name for name, field in AnimalMonitoringData.model_fields.items() if field.annotation is bool
+} | {"is_emergency"}
+
+
+def export_columns(register: str = "") -> list:
+    if not register:
+        return ALL_COLUMNS
+    return BASE_COLUMNS + ["date_or_day", REGISTERS[register]]
+
+
+def iter_observation_pages(supabase, columns: list, start: str = "", end: str = "",
+                           animal_id: str = "", page_size: int = 1000, zoo_ids: Optional[tuple] = None):
+    """Yield pages of observations in (created_at, id) order, one database round trip each."""
+    last_created_at, last_id = "", ""
+    while True:
+        query = supabase.table("observations").select(", ".join(columns))
+        if start:
+            query = query.gte("created_at", start)
+        if end:
+            query = query.lt("created_at", end)
+        if animal_id:
+            query = query.eq("animal_id", animal_id)
+        if zoo_ids is not None:
+            query = query.in_("zoo_id", list(zoo_ids))
+        query = after_cursor(query, "created_at", last_created_at, last_id)
+        rows = query.order("created_at").order("id").limit(page_size).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_created_at, last_id = rows[-1]["created_at"], rows[-1]["id"]
+
+
+def stream_csv(pages, columns: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in pages:
+        for row in rows:
+            writer.writerow([row.get(column) for column in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after every row group."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_parquet(pages, columns: list):
+    """Parquet with one row group per database page, flushed as it is written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (column, pa.bool_() if column in BOOLEAN_COLUMNS else pa.string()) for column in columns
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in pages:
+            table = pa.Table.from_pydict(
+                {
+                    column: [
+                        row.get(column) if column in BOOLEAN_COLUMNS or row.get(column) is None else str(row.get(column))
+                        for row in rows
+                    ]
+                    for column in columns
+                },
+                schema=schema,
+            )
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -1,6 +1,17 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, animals, observations, users
+from app.routes import auth, animals, observations, users, sync, admin, dashboard, zoos
+from app import profiling, tracing
+from app.compression import CompressionMiddleware
+from app.database import get_supabase
+from app.search import search_index
+from app.emergency import emergency_lane
+from app.write_behind import animal_status_buffer
+from app.archive import observation_archive
+from app.worker_bus import worker_bus
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
 
@@ -18,12 +29,95 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Location", "Upload-Offset", "Upload-Length", "Content-Range", "Accept-Ranges", "Server-Timing", "Idempotent-Replayed"],
 )
+# Added before the function middlewares below so it sees whole response bodies
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(animals.router, prefix="/api/animals", tags=["Animals"])
 app.include_router(observations.router, prefix="/api/observations", tags=["Observations"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
+app.include_router(zoos.router, prefix="/api/zoos", tags=["Zoos"])
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    # Opt-in: "X-Profile: 1" header or "?profile=1" from an admin, or PROFILE_SAMPLE_RATE
+    if await profiling.should_profile(request):
+        return await profiling.profile_request(request, call_next)
+    return await call_next(request)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    spans, token = tracing.start_trace()
+    start_ns = time.time_ns()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        tracing.end_trace(token)
+    total_ms = (time.perf_counter() - started) * 1000
+    response.headers["Server-Timing"] = tracing.server_timing(spans, total_ms)
+    response.headers["Timing-Allow-Origin"] = "*"
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    tracing.export_trace(
+        f"{request.method} {route}", start_ns, time.time_ns(), spans,
+        **{"http.method": request.method, "http.route": route, "http.status_code": response.status_code}
+    )
+    return response
+
+@app.on_event("startup")
+async def start_worker_bus():
+    # Before the search index build, so no update published meanwhile is missed
+    worker_bus.start()
+
+@app.on_event("shutdown")
+async def stop_worker_bus():
+    worker_bus.stop()
+
+@app.on_event("startup")
+async def recover_emergency_alerts():
+    await run_in_threadpool(emergency_lane.recover)
+    emergency_lane.start()
+
+@app.on_event("shutdown")
+async def stop_emergency_retries():
+    emergency_lane.stop()
+
+@app.on_event("startup")
+async def start_write_behind():
+    animal_status_buffer.start()
+
+@app.on_event("shutdown")
+async def flush_write_behind():
+    await animal_status_buffer.stop()
+
+@app.on_event("startup")
+async def start_observation_archive():
+    observation_archive.start()
+
+@app.on_event("shutdown")
+async def stop_observation_archive():
+    observation_archive.stop()
+
+def _build_search_index(supabase):
+    # Archived observations first, so a row left in both tiers by an
+    # interrupted archive run ends up indexed from the database
+    for page in observation_archive.iter_pages():
+        for row in page:
+            search_index.add(row)
+    if supabase:
+        search_index.build_from_database(supabase)
+
+@app.on_event("startup")
+async def build_search_index():
+    # Runs in the background so startup does not wait on a full table scan
+    app.state.search_index_build = asyncio.ensure_future(
+        run_in_threadpool(_build_search_index, get_supabase())
+    )
 
 @app.get("/")
 async def root():
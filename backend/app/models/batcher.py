@@ -0,0 +1,104 @@
+import asyncio
+import os
+from app.models.model_router import model_router
+from app.models.zoo_model import zoo_model
+from app.resilience import gemini_admission
+
+GEMINI_BATCH_SIZE = int(os.environ.get("GEMINI_BATCH_SIZE", "8"))
+GEMINI_BATCH_WINDOW_SECONDS = float(os.environ.get("GEMINI_BATCH_WINDOW_MS", "50")) / 1000
+
+
+class StructuringBatcher:
+    """Group observations that arrive close together into one Gemini request.
+
+    Observations are collected per model tier for up to ``window_seconds`` or
+    ``max_batch_size`` items, whichever comes first, and structured with a
+    single prompt, so the schema instructions are paid for once per batch.
+    Items whose output does not validate are retried one at a time.
+    Emergencies are never held back waiting for a batch.
+    """
+
+    def __init__(self, max_batch_size: int, window_seconds: float):
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._pending: dict[str, list] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._tasks = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.retried_items = 0
+
+    async def submit(self, observation_text: str, date: str, is_emergency: bool = False):
+        if is_emergency or self.max_batch_size <= 1:
+            return await gemini_admission.run(zoo_model.process_observation, observation_text, date, is_emergency)
+
+        loop = asyncio.get_running_loop()
+        tier = model_router.choose(observation_text)
+        future = loop.create_future()
+        batch = self._pending.setdefault(tier, [])
+        batch.append((observation_text, date, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(tier)
+        elif len(batch) == 1:
+            self._timers[tier] = loop.call_later(self.window_seconds, self._flush, tier)
+        return await future
+
+    def _flush(self, tier: str):
+        timer = self._timers.pop(tier, None)
+        if timer:
+            timer.cancel()
+        batch = self._pending.pop(tier, [])
+        if batch:
+            task = asyncio.ensure_future(self._run(tier, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, tier: str, batch: list):
+        if len(batch) == 1:
+            text, date, future = batch[0]
+            await self._run_single(text, date, future)
+            return
+
+        try:
+            results = await gemini_admission.run(
+                zoo_model.process_observation_batch, [(text, date) for text, date, _ in batch], tier
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_items += len(batch)
+        retries = []
+        for (text, date, future), result in zip(batch, results):
+            if result is None:
+                retries.append(self._run_single(text, date, future))
+            elif not future.done():
+                future.set_result(result)
+        self.retried_items += len(retries)
+        await asyncio.gather(*retries)
+
+    async def _run_single(self, text: str, date: str, future: asyncio.Future):
+        try:
+            result = await gemini_admission.run(zoo_model.process_observation, text, date)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "window_ms": round(self.window_seconds * 1000, 1),
+            "waiting": sum(len(batch) for batch in self._pending.values()),
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "retried_items": self.retried_items,
+        }
+
+
+structuring_batcher = StructuringBatcher(GEMINI_BATCH_SIZE, GEMINI_BATCH_WINDOW_SECONDS)
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import deque
+from app.search import tokenize
+
+# ----------------------------
+# Model tiers, fastest first
+# ----------------------------
+MODEL_TIERS = {
+    "fast": os.environ.get("GEMINI_FAST_MODEL", "gemini-2.0-flash-lite"),
+    "standard": os.environ.get("GEMINI_STANDARD_MODEL", "gemini-2.0-flash-exp"),
+    "strong": os.environ.get("GEMINI_STRONG_MODEL", "gemini-1.5-pro"),
+}
+TIER_ORDER = list(MODEL_TIERS)
+
+# A slow tier gets traffic again once it has had no calls for this long,
+# otherwise it could never show that it has recovered
+LATENCY_STALE_SECONDS = float(os.environ.get("MODEL_ROUTER_STALE_SECONDS", "60"))
+
+# Word prefixes that suggest something is wrong with the animal. Hindi entries
+# are written the way app.search.tokenize folds them (nukta dropped).
+ABNORMALITY_KEYWORDS = (
+    "injur", "wound", "bleed", "blood", "limp", "lame", "vomit", "diarrh", "letharg",
+    "fever", "seizure", "swell", "swollen", "refus", "collapse", "dead",
+    "death", "fight", "emergenc", "sick", "weak", "unconscious", "discharge",
+    "चोट", "घाव", "खून", "लंगड", "उल्टी", "दस्त", "सुस्त", "बुखार", "सूजन", "बीमार",
+    "मृत", "कमजोर", "दौरा", "बेहोश", "लडाई",
+)
+
+
+class TierStats:
+    """Latency and output quality of one tier over its recent calls."""
+
+    def __init__(self, window: int = 50):
+        self.calls = 0
+        self.failures = 0
+        self.latency_ewma = None
+        self.last_call_at = 0.0
+        self._recent = deque(maxlen=window)
+
+    def record(self, ok: bool, elapsed: float):
+        self.calls += 1
+        self.failures += 0 if ok else 1
+        self._recent.append((ok, elapsed))
+        self.last_call_at = time.monotonic()
+        self.latency_ewma = elapsed if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * elapsed
+
+    def is_slow(self, budget: float) -> bool:
+        if self.latency_ewma is None or time.monotonic() - self.last_call_at > LATENCY_STALE_SECONDS:
+            return False
+        return self.latency_ewma > budget
+
+    def snapshot(self) -> dict:
+        latencies = sorted(elapsed for _, elapsed in self._recent)
+        recent_ok = sum(1 for ok, _ in self._recent if ok)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "recent_success_rate": round(recent_ok / len(self._recent), 3) if self._recent else None,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "latency_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+        }
+
+
+class ModelRouter:
+    """Pick a Gemini tier per observation.
+
+    Short routine notes go to the fast tier, longer ones to standard, and
+    emergencies, long transcripts or notes mentioning abnormality keywords to
+    the strong tier. If a tier's recent latency is over its budget the request
+    steps down a tier, but emergencies and abnormal notes never go below
+    standard.
+    """
+
+    def __init__(self, short_words: int, long_words: int, latency_budgets: dict):
+        self.short_words = short_words
+        self.long_words = long_words
+        self.latency_budgets = latency_budgets
+        self.stats = {tier: TierStats() for tier in TIER_ORDER}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def has_abnormality(text: str) -> bool:
+        lowered = (text or "").lower()
+        if "not eating" in lowered:
+            return True
+        return any(token.startswith(keyword) for token in tokenize(text) for keyword in ABNORMALITY_KEYWORDS)
+
+    def choose(self, text: str, is_emergency: bool = False) -> str:
+        words = len((text or "").split())
+        critical = is_emergency or self.has_abnormality(text)
+        if critical or words > self.long_words:
+            tier = "strong"
+        elif words <= self.short_words:
+            tier = "fast"
+        else:
+            tier = "standard"
+
+        floor = TIER_ORDER.index("standard") if critical else 0
+        with self._lock:
+            while TIER_ORDER.index(tier) > floor:
+                if not self.stats[tier].is_slow(self.latency_budgets[tier]):
+                    break
+                tier = TIER_ORDER[TIER_ORDER.index(tier) - 1]
+        return tier
+
+    def record(self, tier: str, ok: bool, elapsed: float):
+        with self._lock:
+            self.stats[tier].record(ok, elapsed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                tier: {"model": MODEL_TIERS[tier], **self.stats[tier].snapshot()}
+                for tier in TIER_ORDER
+            }
+
+
+model_router = ModelRouter(
+    short_words=int(os.environ.get("MODEL_ROUTER_SHORT_WORDS", "25")),
+    long_words=int(os.environ.get("MODEL_ROUTER_LONG_WORDS", "150")),
+    latency_budgets={
+        "fast": float(os.environ.get("GEMINI_FAST_LATENCY_BUDGET_SECONDS", "2")),
+        "standard": float(os.environ.get("GEMINI_STANDARD_LATENCY_BUDGET_SECONDS", "4")),
+        "strong": float(os.environ.get("GEMINI_STRONG_LATENCY_BUDGET_SECONDS", "8")),
+    },
+)
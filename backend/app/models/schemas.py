@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -13,6 +13,10 @@ class Language(str, Enum):
     ENGLISH = "en"
     HINDI = "hi"
 
+class ZooLevel(str, Enum):
+    REGION = "region"
+    ZOO = "zoo"
+
 class HealthStatus(str, Enum):
     EXCELLENT = "excellent"
     GOOD = "good"
@@ -24,6 +28,7 @@ class User(BaseModel):
     email: str
     name: str
     role: UserRole
+    zoo_id: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -32,6 +37,7 @@ class UserCreate(BaseModel):
     password: str
     name: str
     role: UserRole
+    zoo_id: Optional[str] = None
 
 class UserLogin(BaseModel):
     email: str
@@ -52,6 +58,7 @@ class Animal(BaseModel):
     health: HealthStatus
     last_checked: datetime
     assigned_to: Optional[str] = None
+    zoo_id: Optional[str] = None
     mood: Optional[str] = None
     appetite: Optional[str] = None
     notes: Optional[str] = None
@@ -64,11 +71,13 @@ class AnimalCreate(BaseModel):
     age: Optional[str] = None
     enclosure: Optional[str] = None
     assigned_to: Optional[str] = None
+    zoo_id: Optional[str] = None
 
 class Observation(BaseModel):
     id: str
     animal_id: str
     zookeeper_id: str
+    zoo_id: Optional[str] = None
     date_or_day: str
     animal_observed_on_time: bool
     clean_drinking_water_provided: bool
@@ -86,6 +95,7 @@ class Observation(BaseModel):
     audio_url: Optional[str] = None
     images: Optional[List[str]] = None
     video_url: Optional[str] = None
+    transcript: Optional[str] = None
     vet_comments: Optional[str] = None
     is_emergency: bool = False
     created_at: Optional[datetime] = None
@@ -108,6 +118,7 @@ class FormData(BaseModel):
 
 class ObservationCreate(BaseModel):
     animal_name: str
+    animal_id: Optional[str] = None
     audio_text: Optional[str] = None
     date: str
     is_emergency: bool = False
@@ -126,3 +137,22 @@ class EmergencyAlert(BaseModel):
     description: str
     created_by: str
     created_at: datetime
+
+class Zoo(BaseModel):
+    id: str
+    name: str
+    level: ZooLevel
+    parent_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class ZooCreate(BaseModel):
+    name: str
+    level: ZooLevel = ZooLevel.ZOO
+    parent_id: Optional[str] = None
+
+class SyncRequest(BaseModel):
+    since: Dict[str, str] = Field(default_factory=dict)
+    tables: Optional[List[str]] = None
+    compact: bool = False
+    limit: int = Field(500, ge=1, le=5000)
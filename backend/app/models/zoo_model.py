@@ -1,9 +1,14 @@
+import json
 import os
+import time
 import requests
 from pydantic import BaseModel, Field
 from langchain.prompts import PromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 import google.generativeai as genai
+from app.resilience import gemini_breaker, deepgram_breaker
+from app.tracing import span
+from app.models.model_router import MODEL_TIERS, model_router
 
 # ----------------------------
 # Schema for structured data
@@ -31,17 +36,20 @@ class AnimalMonitoringData(BaseModel):
 class ZooAIModel:
     def __init__(self):
         """Initialize Gemini LLM and Deepgram API."""
-        # Gemini LLM
+        # Gemini LLM, one model per tier
         gem_key = os.environ.get("GOOGLE_API_KEY", "")
         if gem_key:
             genai.configure(api_key=gem_key)
-            self.llm = genai.GenerativeModel("gemini-2.0-flash-exp")
+            self.models = {tier: genai.GenerativeModel(name) for tier, name in MODEL_TIERS.items()}
+            self.llm = self.models["standard"]
         else:
+            self.models = {}
             self.llm = None
 
         # Deepgram API
         self.deepgram_key = os.environ.get("DEEPGRAM_API_KEY", "")
         self.deepgram_url = "https://api.deepgram.com/v1/listen"
+        self.deepgram_timeout = float(os.environ.get("DEEPGRAM_TIMEOUT_SECONDS", "20"))
 
         # Parser & prompt
         self.parser = PydanticOutputParser(pydantic_object=AnimalMonitoringData)
@@ -60,6 +68,22 @@ class ZooAIModel:
             input_variables=["observation"],
             partial_variables={"format_instructions": self.parser.get_format_instructions()},
         )
+        self.batch_prompt = PromptTemplate(
+            template="""
+                You are an animal monitoring assistant.
+                For each numbered observation below, return structured monitoring data.
+                Each item must be a JSON object that matches this schema:
+
+                {format_instructions}
+
+                ONLY return a JSON array with exactly one object per observation, in the
+                same order as the observations, no extra text, no code, no comments.
+
+                {observations}
+            """,
+            input_variables=["observations"],
+            partial_variables={"format_instructions": self.parser.get_format_instructions()},
+        )
 
     # ----------------------------
     # Deepgram Audio Transcription
@@ -69,21 +93,27 @@ class ZooAIModel:
         if not self.deepgram_key:
             return "Audio transcription unavailable - Deepgram API key missing"
 
+        if not deepgram_breaker.allow():
+            return "Error in audio transcription: Deepgram temporarily unavailable"
+
         headers = {
             "Authorization": f"Token {self.deepgram_key}",
             "Content-Type": "audio/webm",
         }
 
+        started = time.monotonic()
         try:
-            response = requests.post(
-                self.deepgram_url,
-                headers=headers,
-                data=audio_bytes,
-                timeout=60,
-                params={"language": language}
-            )
-            response.raise_for_status()
-            result = response.json()
+            with span("deepgram", language=language, bytes=len(audio_bytes)):
+                response = requests.post(
+                    self.deepgram_url,
+                    headers=headers,
+                    data=audio_bytes,
+                    timeout=self.deepgram_timeout,
+                    params={"language": language}
+                )
+                response.raise_for_status()
+                result = response.json()
+            deepgram_breaker.record(True, time.monotonic() - started)
 
             transcript = (
                 result.get("results", {})
@@ -94,25 +124,43 @@ class ZooAIModel:
             return transcript or "No text returned by Deepgram"
 
         except Exception as e:
+            deepgram_breaker.record(False, time.monotonic() - started)
             print("Error transcribing audio:", e)
             return f"Error in audio transcription: {str(e)}"
 
     # ----------------------------
     # Gemini Processing
     # ----------------------------
-    def process_observation(self, observation_text, date):
-        """Convert text observation into structured data using Gemini."""
+    def process_observation(self, observation_text, date, is_emergency=False):
+        """Convert text observation into structured data using the Gemini tier it needs."""
         try:
-            if not self.llm:
+            if not self.llm or not gemini_breaker.allow():
                 return self._create_fallback_data(observation_text, date)
 
+            tier = model_router.choose(observation_text, is_emergency)
             enhanced_observation = f"Date: {date}\nObservation: {observation_text}"
-            response = self.llm.generate_content(
-                self.prompt.format(observation=enhanced_observation)
-            )
+            with span("prompt_format"):
+                prompt = self.prompt.format(observation=enhanced_observation)
+            started = time.monotonic()
+            try:
+                with span("gemini", tier=tier, model=MODEL_TIERS[tier]):
+                    response = self.models[tier].generate_content(prompt)
+            except Exception:
+                elapsed = time.monotonic() - started
+                gemini_breaker.record(False, elapsed)
+                model_router.record(tier, False, elapsed)
+                raise
+            elapsed = time.monotonic() - started
+            gemini_breaker.record(True, elapsed)
 
             json_text = getattr(response, "text", None) or ""
-            result = self.parser.parse(json_text)
+            try:
+                with span("parse"):
+                    result = self.parser.parse(json_text)
+            except Exception:
+                model_router.record(tier, False, elapsed)
+                raise
+            model_router.record(tier, True, elapsed)
 
             if hasattr(result, "date_or_day"):
                 result.date_or_day = date
@@ -123,6 +171,53 @@ class ZooAIModel:
             print(f"Error processing observation: {e}")
             return self._create_fallback_data(observation_text, date)
 
+    def process_observation_batch(self, items, tier):
+        """Structure several ``(observation_text, date)`` pairs with one Gemini call.
+
+        Returns one result per item, ``None`` where the model's output for that
+        item was missing or did not validate, so the caller can retry it alone.
+        """
+        if not self.llm or not gemini_breaker.allow():
+            return [self._create_fallback_data(text, date) for text, date in items]
+
+        observations = "\n\n".join(
+            f"[{number}] Date: {date}\nObservation: {text}"
+            for number, (text, date) in enumerate(items, start=1)
+        )
+        with span("prompt_format", items=len(items)):
+            prompt = self.batch_prompt.format(observations=observations)
+        started = time.monotonic()
+        try:
+            with span("gemini", tier=tier, model=MODEL_TIERS[tier], items=len(items)):
+                response = self.models[tier].generate_content(prompt)
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            gemini_breaker.record(False, elapsed)
+            model_router.record(tier, False, elapsed)
+            print(f"Error processing observation batch: {e}")
+            return [None] * len(items)
+        elapsed = time.monotonic() - started
+        gemini_breaker.record(True, elapsed)
+
+        json_text = getattr(response, "text", None) or ""
+        with span("parse", items=len(items)):
+            try:
+                parsed = json.loads(json_text[json_text.find("["):json_text.rfind("]") + 1])
+            except ValueError:
+                parsed = []
+            if not isinstance(parsed, list):
+                parsed = []
+            results = []
+            for index, (text, date) in enumerate(items):
+                try:
+                    result = AnimalMonitoringData.model_validate(parsed[index])
+                    result.date_or_day = date
+                except Exception:
+                    result = None
+                results.append(result)
+        model_router.record(tier, len(parsed) == len(items) and None not in results, elapsed)
+        return results
+
     def process_audio_observation(self, audio_bytes, date, language="hi"):
         """Transcribe audio and process observation."""
         text = self.transcribe_audio(audio_bytes, language)
@@ -0,0 +1,109 @@
+import os
+import random
+import re
+import time
+from datetime import datetime
+from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
+from app.database import get_supabase
+from app.routes.auth import SECRET_KEY, ALGORITHM
+
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "profiles")
+)
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "50"))
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_MS", "1")) / 1000
+
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.speedscope\.json$")
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # profiling is optional
+    Profiler = None
+
+
+def _is_admin_token(authorization: str) -> bool:
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        email = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return False
+    supabase = get_supabase()
+    if not email or not supabase:
+        return False
+    result = supabase.table("users").select("role").eq("email", email).execute()
+    return bool(result.data) and result.data[0]["role"] == "admin"
+
+
+async def should_profile(request) -> bool:
+    """Profile on an admin's explicit request, or for a sampled share of traffic."""
+    if Profiler is None:
+        return False
+    flagged = request.headers.get("x-profile") == "1" or request.query_params.get("profile") == "1"
+    if flagged:
+        return await run_in_threadpool(_is_admin_token, request.headers.get("authorization", ""))
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _save_profile(profiler, request, elapsed_ms: float) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^\w-]+", "_", request.url.path).strip("_")[:60] or "root"
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{request.method}_{slug}_{elapsed_ms:.0f}ms.speedscope.json"
+    with open(os.path.join(PROFILE_DIR, name), "w") as f:
+        f.write(profiler.output(renderer=SpeedscopeRenderer()))
+    _enforce_retention()
+    return name
+
+
+def _enforce_retention():
+    profiles = list_profiles()
+    for stale in profiles[PROFILE_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, stale["name"]))
+        except FileNotFoundError:
+            pass
+
+
+async def profile_request(request, call_next):
+    profiler = Profiler(interval=PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    try:
+        response.headers["X-Profile-Id"] = await run_in_threadpool(_save_profile, profiler, request, elapsed_ms)
+    except Exception as e:
+        print(f"Error saving request profile: {e}")
+    return response
+
+
+def list_profiles() -> list:
+    """Stored profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if not PROFILE_NAME_PATTERN.match(name):
+            continue
+        stat = os.stat(os.path.join(PROFILE_DIR, name))
+        profiles.append({
+            "name": name,
+            "size": stat.st_size,
+            "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+        })
+    profiles.sort(key=lambda p: p["name"], reverse=True)
+    return profiles
+
+
+def profile_path(name: str):
+    if not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,331 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.worker_bus import worker_bus
+
+# ----------------------------
+# Request coalescing
+# ----------------------------
+def content_key(*parts) -> str:
+    """Stable hash of the inputs that fully determine an AI call."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """Run identical in-flight calls once and hand every caller the same result."""
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn, *args):
+        task = self._inflight.get(key)
+        if task is None:
+            # The shared work runs as its own task so one caller disconnecting
+            # does not cancel it for everybody else waiting on the same key.
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved when every caller went away
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+# ----------------------------
+# Admission control
+# ----------------------------
+class AdmissionController:
+    """Bound concurrent calls to one backend and shed load once the wait queue is full.
+
+    Blocking work is run in the thread pool so vendor calls never stall the
+    event loop.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int,
+                 queue_timeout: float, retry_after: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._active = 0
+
+    def _reject(self):
+        raise HTTPException(
+            status_code=429,
+            detail=f"{self.name} is busy, please retry shortly",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def run(self, fn, *args):
+        if not self._semaphore.locked():
+            # A free slot is taken without yielding, so the check cannot race
+            await self._semaphore.acquire()
+        else:
+            if self._waiting >= self.max_queue:
+                self._reject()
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject()
+            finally:
+                self._waiting -= 1
+
+        self._active += 1
+        try:
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+        }
+
+
+def _admission_from_env(name: str, prefix: str) -> AdmissionController:
+    return AdmissionController(
+        name,
+        max_concurrency=int(os.environ.get(f"{prefix}_MAX_CONCURRENCY", "4")),
+        max_queue=int(os.environ.get(f"{prefix}_MAX_QUEUE", "16")),
+        queue_timeout=float(os.environ.get("AI_QUEUE_TIMEOUT_SECONDS", "10")),
+        retry_after=int(os.environ.get("AI_RETRY_AFTER_SECONDS", "5")),
+    )
+
+
+# ----------------------------
+# Circuit breaker
+# ----------------------------
+class CircuitBreaker:
+    """Stop calling a dependency that keeps failing or answering too slowly.
+
+    Outcomes of the last ``window`` calls are kept; once at least ``min_calls``
+    are recorded and the share of failed or slow ones crosses its threshold the
+    breaker opens for ``open_seconds``. After that a single probe call is let
+    through and its outcome decides whether the breaker closes again.
+    Calls come from worker threads, so state is guarded by a lock.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_rate: float = 0.5, slow_rate: float = 0.5,
+                 slow_call_seconds: float = 10.0, window: int = 20, min_calls: int = 5,
+                 open_seconds: float = 30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record(self, ok: bool, elapsed: float):
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.OPEN:
+                return  # a straggler from before the breaker tripped
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and not slow:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._trip()
+                return
+
+            self._outcomes.append((ok, slow))
+            total = len(self._outcomes)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for outcome_ok, _ in self._outcomes if not outcome_ok)
+            slow_calls = sum(1 for _, outcome_slow in self._outcomes if outcome_slow)
+            if failures / total >= self.failure_rate or slow_calls / total >= self.slow_rate:
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self._state, "recent_calls": len(self._outcomes)}
+
+
+def _breaker_from_env(name: str, prefix: str, slow_call_seconds: float) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate=float(os.environ.get(f"{prefix}_BREAKER_FAILURE_RATE", "0.5")),
+        slow_rate=float(os.environ.get(f"{prefix}_BREAKER_SLOW_RATE", "0.5")),
+        slow_call_seconds=float(os.environ.get(f"{prefix}_BREAKER_SLOW_SECONDS", str(slow_call_seconds))),
+        window=int(os.environ.get(f"{prefix}_BREAKER_WINDOW", "20")),
+        min_calls=int(os.environ.get(f"{prefix}_BREAKER_MIN_CALLS", "5")),
+        open_seconds=float(os.environ.get(f"{prefix}_BREAKER_OPEN_SECONDS", "30")),
+    )
+
+
+# ----------------------------
+# Idempotent retries
+# ----------------------------
+class IdempotencyStore:
+    """Remember the outcome of requests sent with an ``Idempotency-Key``.
+
+    A retry that arrives while the original is still running waits for it; one
+    that arrives later gets the stored result. Entries expire after ``ttl``
+    seconds and at most ``max_entries`` are kept in memory, oldest evicted
+    first. Failed requests are forgotten so the client can try again.
+
+    With a ``shared`` worker bus, keys are also claimed there, so a retry
+    that reaches another worker waits for or replays the first response too.
+    A claim left without a result for ``abandon_after`` seconds belongs to a
+    worker that died and is taken over.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, shared=None,
+                 wait_seconds: float = 30.0, abandon_after: float = 120.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+        self.wait_seconds = wait_seconds
+        self.abandon_after = abandon_after
+        # key -> (request fingerprint, task, expiry)
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+
+    async def run(self, key: str, fingerprint: str, fn, *args):
+        """Run ``fn(*args)`` once per key; returns the result and whether it was replayed."""
+        self._expire()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] != fingerprint:
+                raise HTTPException(
+                    status_code=422, detail="Idempotency-Key was already used for a different request"
+                )
+            task, replayed = entry[1], True
+        else:
+            task, replayed = asyncio.ensure_future(self._run_shared(key, fingerprint, fn, *args)), False
+            self._entries[key] = (fingerprint, task, time.monotonic() + self.ttl)
+            task.add_done_callback(lambda done: self._forget_failed(key, done))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        # Shielded so the work still finishes for a retry if this client disconnects
+        result, replayed_elsewhere = await asyncio.shield(task)
+        return result, replayed or replayed_elsewhere
+
+    async def _run_shared(self, key: str, fingerprint: str, fn, *args):
+        """``fn(*args)`` run under a claim on the shared store; returns the result and whether it was replayed."""
+        if self.shared is None:
+            return await fn(*args), False
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            try:
+                state, stored = await loop.run_in_executor(
+                    self.shared.executor, self.shared.claim, key, fingerprint, self.ttl, self.abandon_after
+                )
+            except Exception as e:
+                # Other workers cannot be asked; this worker's own store still applies
+                print(f"Idempotency claim for {key} failed, running without it: {e}")
+                return await fn(*args), False
+            if state == "claimed":
+                break
+            if state == "mismatch":
+                raise HTTPException(
+                    status_code=422, detail="Idempotency-Key was already used for a different request"
+                )
+            if state == "done":
+                return json.loads(stored), True
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=409, detail="A request with this Idempotency-Key is still in progress"
+                )
+            await asyncio.sleep(0.05)
+
+        try:
+            result = await fn(*args)
+        except BaseException:
+            await loop.run_in_executor(self.shared.executor, self.shared.release, key)
+            raise
+        try:
+            await loop.run_in_executor(self.shared.executor, self.shared.complete, key, json.dumps(result, default=str))
+        except Exception as e:
+            print(f"Error storing idempotent result for {key}: {e}")
+        return result, False
+
+    def _forget_failed(self, key: str, task: asyncio.Task):
+        if task.cancelled() or task.exception() is not None:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is task:
+                del self._entries[key]
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._entries and next(iter(self._entries.values()))[2] <= now:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared across routers
+ai_single_flight = SingleFlight()
+idempotency_store = IdempotencyStore(
+    ttl=float(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60))),
+    max_entries=int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "10000")),
+    shared=worker_bus,
+)
+gemini_admission = _admission_from_env("Gemini", "GEMINI")
+deepgram_admission = _admission_from_env("Deepgram", "DEEPGRAM")
+gemini_breaker = _breaker_from_env("Gemini", "GEMINI", slow_call_seconds=8.0)
+deepgram_breaker = _breaker_from_env("Deepgram", "DEEPGRAM", slow_call_seconds=15.0)
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from app.routes.auth import get_current_user
+from app.profiling import list_profiles, profile_path
+from app.models.model_router import model_router
+from app.models.batcher import structuring_batcher
+from app.write_behind import animal_status_buffer
+from app.archive import observation_archive
+from app.database import get_supabase
+from app.export import parquet_available
+from app.resilience import gemini_admission, deepgram_admission, gemini_breaker, deepgram_breaker
+from app.worker_bus import worker_bus
+
+router = APIRouter()
+
+def require_admin(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can access this resource")
+    return current_user
+
+@router.get("/profiles")
+async def get_profiles(current_user: dict = Depends(require_admin)):
+    return list_profiles()
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str, current_user: dict = Depends(require_admin)):
+    path = profile_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
+
+@router.get("/ai-stats")
+async def get_ai_stats(current_user: dict = Depends(require_admin)):
+    return {
+        "model_tiers": model_router.snapshot(),
+        "batching": structuring_batcher.stats(),
+        "breakers": {"gemini": gemini_breaker.stats(), "deepgram": deepgram_breaker.stats()},
+        "admission": {"gemini": gemini_admission.stats(), "deepgram": deepgram_admission.stats()},
+    }
+
+@router.get("/write-behind")
+async def get_write_behind_stats(current_user: dict = Depends(require_admin)):
+    return {"animal_status": animal_status_buffer.stats()}
+
+@router.get("/worker-bus")
+async def get_worker_bus_stats(current_user: dict = Depends(require_admin)):
+    return worker_bus.stats()
+
+def _require_archive():
+    if not parquet_available():
+        raise HTTPException(status_code=501, detail="Archiving needs the pyarrow package")
+
+@router.get("/archive")
+async def get_archive_stats(current_user: dict = Depends(require_admin)):
+    """Rows and bytes in each storage tier."""
+    hot_rows = None
+    supabase = get_supabase()
+    if supabase:
+        result = await run_in_threadpool(
+            lambda: supabase.table("observations").select("id", count="exact").limit(1).execute()
+        )
+        hot_rows = result.count
+    return {"hot": {"observations": hot_rows}, "archive": await run_in_threadpool(observation_archive.stats)}
+
+@router.post("/archive/run")
+async def run_archive(current_user: dict = Depends(require_admin)):
+    _require_archive()
+    return await run_in_threadpool(observation_archive.run)
+
+@router.post("/archive/compact")
+async def compact_archive(current_user: dict = Depends(require_admin)):
+    _require_archive()
+    return await run_in_threadpool(observation_archive.compact)
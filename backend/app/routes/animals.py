@@ -1,21 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from starlette.concurrency import run_in_threadpool
 from app.models.schemas import Animal, AnimalCreate, User
 from app.routes.auth import get_current_user
 from app.database import get_supabase
+from app.cache import invalidate
+from app.compression import cached_list_response
+from app.scoping import scope_animals, scope_key, scope_tenant
+from app.tenancy import resolve_zoo_id, tenant_zoo_ids
+from app.tracing import span
+from app.bulk_import import AnimalImporter, ImportFormatError, iter_rows
 from typing import List
 import uuid
 from datetime import datetime
 
 router = APIRouter()
 
+def _list_animals(supabase, user: dict):
+    with span("db_read", table="animals"):
+        result = scope_animals(supabase.table("animals").select("*"), user).execute()
+    return [Animal.model_validate(row) for row in result.data]
+
 @router.get("/", response_model=List[Animal])
-async def get_animals(current_user: dict = Depends(get_current_user)):
+async def get_animals(request: Request, current_user: dict = Depends(get_current_user)):
     supabase = get_supabase()
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
-    result = supabase.table("animals").select("*").execute()
-    return result.data
+    return await cached_list_response(
+        request, f"animals:{scope_key(current_user)}", ("animals",), _list_animals, supabase, current_user,
+        zoo_ids=tenant_zoo_ids(current_user)
+    )
 
 @router.get("/{animal_id}", response_model=Animal)
 async def get_animal(animal_id: str, current_user: dict = Depends(get_current_user)):
@@ -23,11 +37,17 @@ async def get_animal(animal_id: str, current_user: dict = Depends(get_current_us
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
-    result = supabase.table("animals").select("*").eq("id", animal_id).execute()
+    with span("db_read", table="animals"):
+        result = scope_animals(supabase.table("animals").select("*").eq("id", animal_id), current_user).execute()
     if not result.data:
         raise HTTPException(status_code=404, detail="Animal not found")
     return result.data[0]
 
+def _raise_if_duplicate_number(error: Exception):
+    # 23505 is PostgreSQL's unique_violation; animals only have the one unique index
+    if getattr(error, "code", None) == "23505":
+        raise HTTPException(status_code=409, detail="Another animal of this species already has this number in the zoo")
+
 @router.post("/", response_model=Animal)
 async def create_animal(animal_data: AnimalCreate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] not in ["admin", "officer"]:
@@ -41,18 +61,59 @@ async def create_animal(animal_data: AnimalCreate, current_user: dict = Depends(
         "id": str(uuid.uuid4()),
         "name": animal_data.name,
         "species": animal_data.species,
-        "number": animal_data.number or "",
+        # NULL rather than "" so animals without a number never collide on
+        # the (zoo_id, species, number) unique index
+        "number": animal_data.number or None,
         "age": animal_data.age or "",
         "enclosure": animal_data.enclosure or "",
         "health": "good",
         "last_checked": datetime.utcnow().isoformat(),
         "assigned_to": animal_data.assigned_to or current_user["id"],
+        "zoo_id": resolve_zoo_id(current_user, animal_data.zoo_id),
         "created_at": datetime.utcnow().isoformat()
     }
     
-    result = supabase.table("animals").insert(new_animal).execute()
+    with span("db_write", table="animals"):
+        try:
+            result = supabase.table("animals").insert(new_animal).execute()
+        except Exception as e:
+            _raise_if_duplicate_number(e)
+            raise
+    invalidate("animals", zoo_id=new_animal["zoo_id"])
     return result.data[0]
 
+@router.post("/import")
+async def import_animals(
+    file: UploadFile = File(...),
+    batch_size: int = 500,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] not in ["admin", "officer"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    
+    try:
+        rows = iter_rows(file.file, file.filename)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    importer = AnimalImporter(
+        supabase,
+        current_user["id"],
+        batch_size=max(1, min(batch_size, 1000)),
+        zoo_id=current_user.get("zoo_id"),
+        allowed_zoo_ids=tenant_zoo_ids(current_user)
+    )
+    report = await run_in_threadpool(importer.run, rows)
+    for zoo_id in importer.zoo_ids:
+        invalidate("animals", zoo_id=zoo_id)
+    if report["aborted"] and not report["total_rows"]:
+        raise HTTPException(status_code=400, detail=report["aborted"])
+    return report
+
 @router.post("/{animal_id}/upload-image")
 async def upload_animal_image(
     animal_id: str,
@@ -75,7 +136,10 @@ async def upload_animal_image(
     
     public_url = supabase.storage.from_("animal-images").get_public_url(file_name)
     
-    supabase.table("animals").update({"image_url": public_url}).eq("id", animal_id).execute()
+    result = scope_tenant(
+        supabase.table("animals").update({"image_url": public_url}).eq("id", animal_id), current_user
+    ).execute()
+    invalidate("animals", zoo_id=result.data[0].get("zoo_id") if result.data else None)
     
     return {"url": public_url, "message": "Image uploaded successfully"}
 
@@ -92,8 +156,20 @@ async def update_animal(
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
+    if "zoo_id" in animal_data:
+        animal_data["zoo_id"] = resolve_zoo_id(current_user, animal_data["zoo_id"])
+    if "number" in animal_data:
+        animal_data["number"] = animal_data["number"] or None
     animal_data["updated_at"] = datetime.utcnow().isoformat()
-    result = supabase.table("animals").update(animal_data).eq("id", animal_id).execute()
+    with span("db_write", table="animals"):
+        try:
+            result = scope_tenant(
+                supabase.table("animals").update(animal_data).eq("id", animal_id), current_user
+            ).execute()
+        except Exception as e:
+            _raise_if_duplicate_number(e)
+            raise
+    invalidate("animals", zoo_id=result.data[0].get("zoo_id") if result.data else None)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="Animal not found")
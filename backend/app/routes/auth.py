@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from app.models.schemas import User, UserCreate, UserLogin, Token
 from app.database import get_supabase
+from app.tracing import span
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
@@ -31,6 +32,27 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_claims(user: dict) -> dict:
+    """What an access token carries about its user, beyond the email in ``sub``."""
+    claims = {"sub": user["email"], "uid": str(user["id"])}
+    if user.get("zoo_id"):
+        claims["zoo"] = str(user["zoo_id"])
+    return claims
+
+def decode_token(token: str) -> dict:
+    """Claims of a valid access token, checked without a database lookup."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        payload = {}
+    if not isinstance(payload.get("sub"), str) or not payload["sub"]:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,7 +71,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
-    result = supabase.table("users").select("*").eq("email", email).execute()
+    with span("auth_lookup"):
+        result = supabase.table("users").select("*").eq("email", email).execute()
     if not result.data:
         raise credentials_exception
     return result.data[0]
@@ -77,7 +100,7 @@ async def register(user_data: UserCreate):
     
     result = supabase.table("users").insert(new_user).execute()
     
-    access_token = create_access_token(data={"sub": user_data.email})
+    access_token = create_access_token(data=token_claims(result.data[0]))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
@@ -95,7 +118,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": form_data.username})
+    access_token = create_access_token(data=token_claims(result.data[0]))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=User)
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.models.schemas import UserRole
+from app.routes.auth import get_current_user
+from app.database import get_supabase
+from app.cache import dashboard_cache
+from app.scoping import scope_animals, scope_key, scope_observations, scope_tenant
+from app.tenancy import tenant_zoo_ids
+from app.tracing import span
+from collections import Counter
+from datetime import datetime, timedelta
+
+router = APIRouter()
+
+RECENT_LIMIT = 10
+ALERT_LIMIT = 20
+ANIMAL_CARD_COLUMNS = "id, name, species, enclosure, image_url, health, last_checked"
+OBSERVATION_SUMMARY_COLUMNS = "id, animal_id, zookeeper_id, date_or_day, is_emergency, normal_behaviour_status, created_at"
+ALERT_COLUMNS = "id, animal_id, observation_id, description, created_by, created_at"
+
+# Tables each view is computed from; a write to any of them refreshes the view
+DASHBOARD_TABLES = {
+    "admin": ("animals", "users", "observations", "emergency_alerts"),
+    "officer": ("animals", "observations", "emergency_alerts"),
+    "vet": ("animals", "observations", "emergency_alerts"),
+    "zookeeper": ("animals", "observations"),
+}
+
+def _count(query) -> int:
+    return query.limit(1).execute().count or 0
+
+def _recent_observations(supabase, user: dict, emergencies_only: bool = False):
+    query = scope_observations(supabase.table("observations").select(OBSERVATION_SUMMARY_COLUMNS), user)
+    if emergencies_only:
+        query = query.eq("is_emergency", True)
+    return query.order("created_at", desc=True).limit(RECENT_LIMIT).execute().data or []
+
+def _active_alerts(supabase, user: dict):
+    return (
+        scope_tenant(supabase.table("emergency_alerts").select(ALERT_COLUMNS, count="exact"), user)
+        .eq("resolved", False).order("created_at", desc=True).limit(ALERT_LIMIT).execute()
+    )
+
+def _admin_summary(supabase, user: dict, today: str):
+    alerts = _active_alerts(supabase, user)
+    roles = scope_tenant(supabase.table("users").select("role"), user).execute().data or []
+    return {
+        "counts": {
+            "animals": _count(scope_animals(supabase.table("animals").select("id", count="exact"), user)),
+            "users": len(roles),
+            "active_alerts": alerts.count or 0,
+            "observations_today": _count(
+                scope_observations(supabase.table("observations").select("id", count="exact"), user)
+                .gte("created_at", today)
+            ),
+        },
+        "users_by_role": dict(Counter(row["role"] for row in roles)),
+        "active_alerts": alerts.data or [],
+        "recent_observations": _recent_observations(supabase, user),
+    }
+
+def _officer_summary(supabase, user: dict, today: str):
+    week_ago = (datetime.fromisoformat(today) - timedelta(days=7)).isoformat()
+    health = scope_animals(supabase.table("animals").select("health"), user).execute().data or []
+    return {
+        "counts": {
+            "animals": len(health),
+            "active_alerts": _active_alerts(supabase, user).count or 0,
+            "observations_today": _count(
+                scope_observations(supabase.table("observations").select("id", count="exact"), user)
+                .gte("created_at", today)
+            ),
+            "observations_last_7_days": _count(
+                scope_observations(supabase.table("observations").select("id", count="exact"), user)
+                .gte("created_at", week_ago)
+            ),
+        },
+        "animals_by_health": dict(Counter(row["health"] for row in health)),
+        "recent_observations": _recent_observations(supabase, user),
+    }
+
+def _vet_summary(supabase, user: dict, today: str):
+    alerts = _active_alerts(supabase, user)
+    attention = (
+        scope_animals(supabase.table("animals").select(ANIMAL_CARD_COLUMNS, count="exact"), user)
+        .in_("health", ["fair", "poor"]).order("last_checked").limit(ALERT_LIMIT).execute()
+    )
+    return {
+        "counts": {
+            "active_alerts": alerts.count or 0,
+            "animals_needing_attention": attention.count or 0,
+            "emergency_observations_today": _count(
+                scope_observations(supabase.table("observations").select("id", count="exact"), user)
+                .eq("is_emergency", True).gte("created_at", today)
+            ),
+        },
+        "active_alerts": alerts.data or [],
+        "animals_needing_attention": attention.data or [],
+        "recent_emergencies": _recent_observations(supabase, user, emergencies_only=True),
+    }
+
+def _zookeeper_summary(supabase, user: dict, today: str):
+    animals = (
+        scope_animals(supabase.table("animals").select(ANIMAL_CARD_COLUMNS), user)
+        .order("name").execute().data or []
+    )
+    return {
+        "counts": {
+            "assigned_animals": len(animals),
+            "pending_checks": sum(1 for animal in animals if (animal.get("last_checked") or "") < today),
+            "observations_today": _count(
+                scope_observations(supabase.table("observations").select("id", count="exact"), user)
+                .gte("created_at", today)
+            ),
+        },
+        "animals": animals,
+        "recent_observations": _recent_observations(supabase, user),
+    }
+
+SUMMARIES = {
+    "admin": _admin_summary,
+    "officer": _officer_summary,
+    "vet": _vet_summary,
+    "zookeeper": _zookeeper_summary,
+}
+
+@router.get("/{role}")
+async def get_dashboard(role: UserRole, current_user: dict = Depends(get_current_user)):
+    """Everything one role's dashboard shows, in a single response."""
+    if current_user["role"] not in (role.value, "admin"):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    today = datetime.utcnow().date().isoformat()
+    with span("dashboard", role=role.value):
+        summary = await dashboard_cache.get_or_compute(
+            f"{role.value}:{scope_key(current_user)}:{today}",
+            DASHBOARD_TABLES[role.value],
+            SUMMARIES[role.value],
+            supabase,
+            current_user,
+            today,
+            zoo_ids=tenant_zoo_ids(current_user)
+        )
+    return {"role": role.value, "generated_for": today, **summary}
@@ -1,28 +1,222 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from app.models.schemas import Observation, ObservationCreate, User
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from app.models.schemas import HealthStatus, Observation, ObservationCreate, User
 from app.database import get_supabase
-from app.models.zoo_model import zoo_model
+from app.cache import invalidate
+from app.compression import cached_list_response
+from app.scoping import observation_owner, scope_animals, scope_key, scope_observations
+from app.tenancy import tenant_zoo_ids
+from app.models.zoo_model import AnimalMonitoringData, zoo_model
+from app.models.batcher import structuring_batcher
+from app.uploads import media_store, parse_range, UploadError
+from app.search import index_observation, search_index
+from app.emergency import emergency_lane
+from app.write_behind import animal_status_buffer
+from app.archive import merge_pages, observation_archive
+from app.tracing import span
+from app.export import REGISTERS, export_columns, iter_observation_pages, parquet_available, stream_csv, stream_parquet
+from app.routes.auth import decode_token, get_current_user, oauth2_scheme
+from app.resilience import ai_single_flight, content_key, deepgram_admission, idempotency_store
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
 from typing import List, Optional
+import asyncio
+import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 
 router = APIRouter()
 
+# How long an observation submit waits for Gemini before answering with fallback data
+OBSERVATION_AI_BUDGET_SECONDS = float(os.environ.get("OBSERVATION_AI_BUDGET_MS", "3000")) / 1000
+LATE_RESULTS_MAX = 1000
+
+# Structured results that arrived after the budget, by observation id (oldest evicted first).
+# ``None`` marks a result still being worked on by this process. The observations row is the
+# record every worker reads; this is only a shortcut for the worker that made the AI call.
+late_results: "OrderedDict[str, Optional[dict]]" = OrderedDict()
+_background_tasks = set()
+
+def _remember_late_result(observation_id: str, fields: Optional[dict]):
+    late_results[observation_id] = fields
+    late_results.move_to_end(observation_id)
+    while len(late_results) > LATE_RESULTS_MAX:
+        late_results.popitem(last=False)
+
+async def _save_late_result(observation_id: str, fields: dict):
+    supabase = get_supabase()
+    if not supabase:
+        return
+    try:
+        result = await run_in_threadpool(
+            lambda: supabase.table("observations").update({**fields, "ai_pending": False}).eq("id", observation_id).execute()
+        )
+    except Exception as e:
+        print(f"Error saving late AI result for observation {observation_id}: {e}")
+        return
+    if result.data:
+        # The structured text replaces the fallback data the row was indexed with
+        index_observation(result.data[0])
+    invalidate("observations", zoo_id=result.data[0].get("zoo_id") if result.data else None)
+
+async def _complete_late_result(observation_id: str, ai_task: asyncio.Task):
+    """Wait for an over-budget AI call and store its structured result once it lands."""
+    try:
+        structured_data = await ai_task
+    except Exception as e:
+        print(f"Late AI result for observation {observation_id} failed: {e}")
+        # The fallback data already stored is the final answer
+        late_results.pop(observation_id, None)
+        await _save_late_result(observation_id, {})
+        return
+
+    fields = structured_data.model_dump()
+    _remember_late_result(observation_id, fields)
+    await _save_late_result(observation_id, fields)
+
+async def _structure_within_budget(observation_id: str, observation_text: str, date: str,
+                                   is_emergency: bool = False):
+    """Structure text with Gemini, or return fallback data if it misses the latency budget.
+
+    Returns the structured data and whether the real result is still pending.
+    """
+    ai_task = asyncio.ensure_future(ai_single_flight.do(
+        content_key("process_observation", observation_text, date, str(is_emergency)),
+        structuring_batcher.submit,
+        observation_text,
+        date,
+        is_emergency
+    ))
+    try:
+        return await asyncio.wait_for(asyncio.shield(ai_task), timeout=OBSERVATION_AI_BUDGET_SECONDS), False
+    except asyncio.TimeoutError:
+        _remember_late_result(observation_id, None)
+        follow_up = asyncio.ensure_future(_complete_late_result(observation_id, ai_task))
+        _background_tasks.add(follow_up)
+        follow_up.add_done_callback(_background_tasks.discard)
+        return zoo_model._create_fallback_data(observation_text, date), True
+
+def _list_observations(supabase, user: dict, animal_id: str, limit: int):
+    query = scope_observations(supabase.table("observations").select("*"), user)
+    if animal_id:
+        query = query.eq("animal_id", animal_id)
+    with span("db_read", table="observations"):
+        result = query.order("created_at", desc=True).order("id", desc=True).limit(limit).execute()
+    rows = result.data or []
+    # Archived rows are all older than the newest one in the archive, so it is
+    # only read when the page could still reach back that far
+    newest_archived = observation_archive.newest(tenant_zoo_ids(user))
+    if newest_archived and (len(rows) < limit or (rows[-1].get("created_at") or "") <= newest_archived):
+        with span("archive_read"):
+            archived = observation_archive.recent(limit, animal_id, tenant_zoo_ids(user), observation_owner(user))
+        hot_ids = {row["id"] for row in rows}
+        rows += [row for row in archived if row["id"] not in hot_ids]
+        rows.sort(key=lambda row: (row.get("created_at") or "", row["id"]), reverse=True)
+    return rows[:limit]
+
 @router.get("/")
-async def get_observations(animal_id: Optional[str] = None):
-    return []
+async def get_observations(
+    request: Request,
+    animal_id: Optional[str] = None,
+    limit: int = 200,
+    current_user: dict = Depends(get_current_user)
+):
+    """Most recent observations first, optionally for one animal."""
+    supabase = get_supabase()
+    if not supabase:
+        return []
+    limit = max(1, min(limit, 1000))
+    return await cached_list_response(
+        request,
+        f"observations:{scope_key(current_user)}:{animal_id or ''}:{limit}",
+        ("observations",),
+        _list_observations,
+        supabase,
+        current_user,
+        animal_id or "",
+        limit,
+        zoo_ids=tenant_zoo_ids(current_user)
+    )
+
+def _record_id(scope: str, idempotency_key: Optional[str]) -> str:
+    """Fresh id, or one derived from the Idempotency-Key so every retry gets the same id."""
+    if idempotency_key:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{scope}:{idempotency_key}"))
+    return str(uuid.uuid4())
+
+async def _run_idempotent(response: Response, scope: str, idempotency_key: Optional[str], payload, fn, *args):
+    """Run a create once per Idempotency-Key; retries wait for or replay the first response."""
+    if not idempotency_key:
+        return await fn(*args)
+    if len(idempotency_key) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key must be at most 255 characters")
+    result, replayed = await idempotency_store.run(
+        content_key(scope, idempotency_key),
+        content_key(json.dumps(payload, sort_keys=True, default=str)),
+        fn,
+        *args
+    )
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
 @router.post("/")
-async def create_observation(observation_data: ObservationCreate):
-    animal_id = str(uuid.uuid4())
+async def create_observation(observation_data: ObservationCreate, response: Response,
+                             idempotency_key: Optional[str] = Header(None),
+                             current_user: dict = Depends(get_current_user)):
+    scope = f"create_observation:{current_user['id']}"
+    return await _run_idempotent(
+        response,
+        scope,
+        idempotency_key,
+        observation_data.model_dump(),
+        _create_observation,
+        observation_data,
+        _record_id(scope, idempotency_key),
+        current_user
+    )
+
+def _animal_status(observation: dict) -> dict:
+    """Fields an observation sets on its animal: when it was checked, and its health if worrying."""
+    status = {"last_checked": observation["created_at"]}
+    if observation.get("is_emergency"):
+        status["health"] = HealthStatus.POOR.value
+    elif observation.get("normal_behaviour_status") is False:
+        status["health"] = HealthStatus.FAIR.value
+    return status
+
+async def _owned_animal(animal_id: str, user: dict) -> Optional[dict]:
+    """The animal's row if the user may record observations for it, else 404.
+
+    ``None`` when no database is configured, since there is nothing to check against.
+    """
+    supabase = get_supabase()
+    if not supabase:
+        return None
+    with span("db_read", table="animals"):
+        result = await run_in_threadpool(
+            lambda: scope_animals(supabase.table("animals").select("id, zoo_id").eq("id", animal_id), user).execute()
+        )
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Animal not found")
+    emergency_lane.remember_animal_zoo(animal_id, result.data[0].get("zoo_id"))
+    return result.data[0]
+
+async def _create_observation(observation_data: ObservationCreate, observation_id: str, user: dict):
+    animal_id = observation_data.animal_id
+    # Checked before any AI work, so a bad id fails fast and is never buffered
+    animal = await _owned_animal(observation_data.animal_id, user) if observation_data.animal_id else None
+    # The animal's zoo, not the user's: region and global users are bound above any one zoo
+    zoo_id = animal["zoo_id"] if animal else user.get("zoo_id")
     
     if observation_data.form_data:
         form_data = observation_data.form_data
         new_observation = {
-            "id": str(uuid.uuid4()),
+            "id": observation_id,
             "animal_id": animal_id,
-            "zookeeper_id": "demo-user",
+            "zookeeper_id": user["id"],
+            "zoo_id": zoo_id,
             "date_or_day": form_data.date_or_day,
             "animal_observed_on_time": form_data.animal_observed_on_time,
             "clean_drinking_water_provided": form_data.clean_drinking_water_provided,
@@ -44,15 +238,19 @@ async def create_observation(observation_data: ObservationCreate):
             "created_at": datetime.utcnow().isoformat()
         }
     else:
-        structured_data = zoo_model.process_observation(
-            observation_data.audio_text or "",
-            observation_data.date
-        )
+        with span("ai_structuring"):
+            structured_data, ai_pending = await _structure_within_budget(
+                observation_id,
+                observation_data.audio_text or "",
+                observation_data.date,
+                observation_data.is_emergency
+            )
         
         new_observation = {
-            "id": str(uuid.uuid4()),
+            "id": observation_id,
             "animal_id": animal_id,
-            "zookeeper_id": "demo-user",
+            "zookeeper_id": user["id"],
+            "zoo_id": zoo_id,
             "date_or_day": structured_data.date_or_day,
             "animal_observed_on_time": structured_data.animal_observed_on_time,
             "clean_drinking_water_provided": structured_data.clean_drinking_water_provided,
@@ -71,9 +269,28 @@ async def create_observation(observation_data: ObservationCreate):
             "has_animal_images": observation_data.has_animal_images,
             "has_enclosure_images": observation_data.has_enclosure_images,
             "has_emergency_video": observation_data.has_emergency_video,
+            "transcript": observation_data.audio_text,
+            "ai_pending": ai_pending,
             "created_at": datetime.utcnow().isoformat()
         }
     
+    supabase = get_supabase()
+    if supabase:
+        # Upsert, so a retry that reaches another worker with the same Idempotency-Key
+        # lands on the same row instead of failing
+        with span("db_write", table="observations"):
+            await run_in_threadpool(lambda: supabase.table("observations").upsert(new_observation).execute())
+        late = late_results.get(observation_id)
+        if late:
+            # The AI result landed while the row was being written
+            await _save_late_result(observation_id, late)
+            new_observation.update(late, ai_pending=False)
+    
+    with span("search_index"):
+        index_observation(new_observation)
+    invalidate("observations", zoo_id=new_observation["zoo_id"])
+    if animal:
+        animal_status_buffer.put(animal["id"], _animal_status(new_observation), zoo_id)
     return new_observation
 
 @router.post("/audio-transcribe")
@@ -81,36 +298,406 @@ async def transcribe_audio(
     audio: UploadFile = File(...),
     language: str = Form("hi")
 ):
-    audio_bytes = await audio.read()
+    with span("upload_read"):
+        audio_bytes = await audio.read()
     
-    transcript = zoo_model.transcribe_audio(audio_bytes, language)
+    transcript = await ai_single_flight.do(
+        content_key("transcribe_audio", language, audio_bytes),
+        deepgram_admission.run,
+        zoo_model.transcribe_audio,
+        audio_bytes,
+        language
+    )
     
     return {
         "transcript": transcript,
         "language": language
     }
 
+@router.get("/search")
+async def search_observations(
+    q: str,
+    days: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+    current_user: dict = Depends(get_current_user)
+):
+    limit = max(1, min(limit, 100))
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    with span("search_index"):
+        results = search_index.search(
+            q,
+            limit=limit,
+            offset=max(0, offset),
+            since=since,
+            zookeeper_id=observation_owner(current_user),
+            zoo_ids=tenant_zoo_ids(current_user)
+        )
+
+    supabase = get_supabase()
+    if supabase and results["hits"]:
+        ids = [hit["id"] for hit in results["hits"]]
+        with span("db_read", table="observations"):
+            rows = scope_observations(supabase.table("observations").select("*").in_("id", ids), current_user).execute()
+        by_id = {row["id"]: row for row in rows.data or []}
+        archived_ids = [hit["id"] for hit in results["hits"] if hit["id"] not in by_id]
+        if archived_ids:
+            # Hits for observations that have moved to the archive
+            months = {hit["created_at"][:7] for hit in results["hits"] if hit["created_at"]}
+            with span("archive_read"):
+                archived = await run_in_threadpool(
+                    observation_archive.lookup, archived_ids, months,
+                    tenant_zoo_ids(current_user), observation_owner(current_user)
+                )
+            by_id.update((row["id"], row) for row in archived)
+        for hit in results["hits"]:
+            hit["observation"] = by_id.get(hit["id"])
+
+    return {"query": q, "limit": limit, "offset": offset, **results}
+
+@router.get("/export")
+async def export_observations(
+    format: str = "csv",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    animal_id: Optional[str] = None,
+    register: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] not in ["admin", "officer", "vet"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if format not in ["csv", "parquet"]:
+        raise HTTPException(status_code=400, detail="format must be csv or parquet")
+    if register and register not in REGISTERS:
+        raise HTTPException(status_code=400, detail=f"register must be one of: {', '.join(REGISTERS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export needs the pyarrow package")
+    
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    
+    columns = export_columns(register or "")
+    zoo_ids = tenant_zoo_ids(current_user)
+    pages = merge_pages(
+        observation_archive.iter_pages(start or "", end or "", animal_id or "", zoo_ids),
+        iter_observation_pages(supabase, columns, start or "", end or "", animal_id or "", zoo_ids=zoo_ids)
+    )
+    filename = f"observations_{register or 'all'}_{datetime.utcnow():%Y%m%d}.{format}"
+    if format == "parquet":
+        body, media_type = stream_parquet(pages, columns), "application/vnd.apache.parquet"
+    else:
+        body, media_type = stream_csv(pages, columns), "text/csv; charset=utf-8"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/{observation_id}/ai-result")
+async def get_ai_result(observation_id: str, current_user: dict = Depends(get_current_user)):
+    supabase = get_supabase()
+    row = None
+    if supabase:
+        columns = ", ".join(["ai_pending", *AnimalMonitoringData.model_fields])
+        with span("db_read", table="observations"):
+            result = await run_in_threadpool(
+                lambda: scope_observations(
+                    supabase.table("observations").select(columns).eq("id", observation_id), current_user
+                ).execute()
+            )
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Observation not found")
+        row = result.data[0]
+    
+    # Checked after the scoped read, and ahead of the row, which may not have the result yet
+    fields = late_results.get(observation_id)
+    if fields is not None:
+        return {"status": "complete", "data": fields}
+    if row is None:
+        if observation_id in late_results:
+            return {"status": "pending", "data": None}
+        raise HTTPException(status_code=404, detail="Observation not found")
+    if row.pop("ai_pending", False):
+        return {"status": "pending", "data": None}
+    return {"status": "complete", "data": row}
+
+def _media_url(media_id: str) -> str:
+    return f"/api/observations/media/{media_id}"
+
+def _upload_status(info: dict) -> dict:
+    return {
+        "upload_id": info["id"],
+        "observation_id": info["observation_id"],
+        "media_type": info["media_type"],
+        "offset": info["offset"],
+        "length": info["length"],
+        "url": _media_url(info["media_id"]) if info.get("media_id") else None,
+    }
+
+async def _attach_media(observation_id: str, media_type: str, url: str):
+    """Point the observation row at finished media when the database is configured."""
+    supabase = get_supabase()
+    if not supabase:
+        return
+
+    def attach():
+        if media_type == "video":
+            result = supabase.table("observations").update({"video_url": url}).eq("id", observation_id).execute()
+            return result.data[0].get("zoo_id") if result.data else None
+        result = supabase.table("observations").select("images, zoo_id").eq("id", observation_id).execute()
+        if result.data:
+            images = (result.data[0].get("images") or []) + [url]
+            supabase.table("observations").update({"images": images}).eq("id", observation_id).execute()
+            return result.data[0].get("zoo_id")
+
+    try:
+        zoo_id = await run_in_threadpool(attach)
+    except Exception as e:
+        print(f"Error attaching media to observation {observation_id}: {e}")
+        return
+    invalidate("observations", zoo_id=zoo_id)
+
+async def _owned_observation(observation_id: str, user: dict) -> Optional[dict]:
+    """The observation's id, zoo and keeper; 404 unless it exists and is one the user can see.
+
+    ``None`` when no database is configured, since there is nothing to check against.
+    """
+    supabase = get_supabase()
+    if not supabase:
+        return None
+    with span("db_read", table="observations"):
+        result = await run_in_threadpool(
+            lambda: scope_observations(
+                supabase.table("observations").select("id, zoo_id, zookeeper_id").eq("id", observation_id), user
+            ).execute()
+        )
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Observation not found")
+    return result.data[0]
+
+async def _check_media_access(info: dict, user: dict):
+    """404 unless the user can see the observation the media belongs to."""
+    if "zoo_id" not in info:
+        # Stored before media recorded its observation's zoo
+        try:
+            await _owned_observation(info["observation_id"], user)
+        except HTTPException:
+            raise HTTPException(status_code=404, detail="Media not found")
+        return
+    zoo_ids = tenant_zoo_ids(user)
+    owner = observation_owner(user)
+    if (zoo_ids is not None and info["zoo_id"] not in zoo_ids) or (owner and info["zookeeper_id"] != owner):
+        raise HTTPException(status_code=404, detail="Media not found")
+
+def _owned_upload(upload_id: str, user: dict) -> dict:
+    """The upload's info, if the user started it; admins may manage any upload."""
+    try:
+        info = media_store.info(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if info.get("owner") != user["id"] and user["role"] != "admin":
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return info
+
 @router.post("/{observation_id}/add-media")
 async def add_media_to_observation(
     observation_id: str,
     file: UploadFile = File(...),
-    media_type: str = Form("image")
+    media_type: str = Form("image"),
+    current_user: dict = Depends(get_current_user)
+):
+    observation = await _owned_observation(observation_id, current_user) or {}
+    try:
+        info = await run_in_threadpool(
+            media_store.save_file, observation_id, media_type, file.file, file.filename or "", file.content_type or "",
+            current_user["id"], observation.get("zoo_id"), observation.get("zookeeper_id")
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    url = _media_url(info["media_id"])
+    await _attach_media(observation_id, media_type, url)
+    return {"url": url, "message": f"{media_type.capitalize()} uploaded successfully"}
+
+# ----------------------------
+# Resumable uploads (tus-style)
+# ----------------------------
+@router.post("/{observation_id}/uploads", status_code=201)
+async def create_upload(
+    observation_id: str,
+    response: Response,
+    upload_length: int = Header(..., alias="Upload-Length"),
+    media_type: str = "video",
+    filename: str = "",
+    content_type: str = "",
+    current_user: dict = Depends(get_current_user)
 ):
-    return {"url": "https://demo.url/media.jpg", "message": f"{media_type.capitalize()} uploaded successfully (demo mode)"}
+    observation = await _owned_observation(observation_id, current_user) or {}
+    try:
+        info = media_store.create(
+            observation_id, media_type, upload_length, filename, content_type, current_user["id"],
+            observation.get("zoo_id"), observation.get("zookeeper_id")
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    response.headers["Location"] = f"/api/observations/uploads/{info['id']}"
+    response.headers["Upload-Offset"] = "0"
+    return _upload_status(info)
+
+@router.head("/uploads/{upload_id}")
+async def get_upload_offset(upload_id: str, current_user: dict = Depends(get_current_user)):
+    info = _owned_upload(upload_id, current_user)
+    return Response(headers={
+        "Upload-Offset": str(info["offset"]),
+        "Upload-Length": str(info["length"]),
+        "Cache-Control": "no-store",
+    })
+
+@router.patch("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: dict = Depends(get_current_user)
+):
+    _owned_upload(upload_id, current_user)
+    try:
+        offset = await media_store.append(upload_id, upload_offset, request.stream())
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    _owned_upload(upload_id, current_user)
+    try:
+        info = await media_store.finalize(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    await _attach_media(info["observation_id"], info["media_type"], _media_url(info["media_id"]))
+    return _upload_status(info)
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def terminate_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    _owned_upload(upload_id, current_user)
+    try:
+        media_store.terminate(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return Response(status_code=204)
+
+@router.get("/media/{media_id}")
+async def get_media(media_id: str, range_header: Optional[str] = Header(None, alias="Range"),
+                    current_user: dict = Depends(get_current_user)):
+    try:
+        info = media_store.media(media_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    await _check_media_access(info, current_user)
+    try:
+        byte_range = parse_range(range_header, info["length"])
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail,
+                            headers={"Content-Range": f"bytes */{info['length']}"})
+
+    start, end = byte_range or (0, info["length"] - 1)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+    }
+    status_code = 200
+    if byte_range:
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{info['length']}"
+    return StreamingResponse(
+        media_store.iter_range(info["path"], start, end),
+        status_code=status_code,
+        media_type=info["content_type"],
+        headers=headers,
+    )
 
 @router.post("/{observation_id}/vet-comment")
-async def add_vet_comment(observation_id: str, comment: dict):
-    return {"message": "Comment added successfully (demo mode)"}
+async def add_vet_comment(observation_id: str, comment: dict, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["vet", "admin"]:
+        raise HTTPException(status_code=403, detail="Only vets and admins can comment on observations")
+    text = comment.get("comment", "")
+    health = comment.get("health")
+    if health is not None and health not in {status.value for status in HealthStatus}:
+        raise HTTPException(status_code=400, detail="Invalid health status")
+    
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    
+    # The animal and zoo come from the stored observation, never from the request
+    query = supabase.table("observations").update({"vet_comments": text}).eq("id", observation_id)
+    with span("db_write", table="observations"):
+        result = scope_observations(query, current_user).execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Observation not found")
+    animal_id = result.data[0].get("animal_id")
+    zoo_id = result.data[0].get("zoo_id")
+    invalidate("observations", zoo_id=zoo_id)
+    # The comment replaces any earlier one, so re-index the whole stored row
+    index_observation(result.data[0])
+    if animal_id:
+        status = {"last_checked": datetime.utcnow().isoformat()}
+        if health:
+            status["health"] = health
+        animal_status_buffer.put(animal_id, status, zoo_id)
+    return {"message": "Comment added successfully"}
 
 @router.post("/emergency-alert")
-async def create_emergency_alert(alert_data: dict):
+async def create_emergency_alert(alert_data: dict, response: Response,
+                                 idempotency_key: Optional[str] = Header(None),
+                                 token: str = Depends(oauth2_scheme)):
+    # Kept free of auth lookups, AI calls and shared pools: see app/emergency.py.
+    # The token is only decoded, so the sender is known without a database read.
+    claims = decode_token(token)
+    scope = f"create_emergency_alert:{claims.get('uid') or claims['sub']}"
+    return await _run_idempotent(
+        response,
+        scope,
+        idempotency_key,
+        alert_data,
+        _create_emergency_alert,
+        alert_data,
+        _record_id(scope, idempotency_key),
+        claims
+    )
+
+async def _create_emergency_alert(alert_data: dict, alert_id: str, claims: dict):
     emergency = {
-        "id": str(uuid.uuid4()),
-        "animal_id": alert_data.get("animal_id", "demo-animal"),
+        "id": alert_id,
+        "animal_id": alert_data.get("animal_id"),
         "observation_id": alert_data.get("observation_id"),
         "description": alert_data.get("description", "Emergency alert"),
-        "created_by": "demo-user",
+        # Tokens issued before the uid claim existed leave the sender unknown
+        "created_by": claims.get("uid"),
+        "zoo_id": claims.get("zoo"),
         "created_at": datetime.utcnow().isoformat()
     }
     
-    return {"message": "Emergency alert created (demo mode)", "data": emergency}
+    await emergency_lane.submit(emergency)
+    return {"message": "Emergency alert created", "data": emergency}
+
+@router.get("/emergency-alerts/stream")
+async def stream_emergency_alerts(request: Request, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] not in ["vet", "admin"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    queue = emergency_lane.subscribe(tenant_zoo_ids(current_user))
+    
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    alert = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: emergency\ndata: {json.dumps(alert)}\n\n"
+        finally:
+            emergency_lane.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.models.schemas import SyncRequest
+from app.routes.auth import get_current_user
+from app.database import get_supabase, after_cursor
+from app.scoping import scope_animals, scope_observations, scope_tenant
+
+router = APIRouter()
+
+# Columns each table exposes to offline clients, keyed by table name
+SYNC_TABLES = {
+    "animals": "*",
+    "observations": "*",
+    "users": "id, email, name, role, zoo_id, created_at, updated_at",
+}
+
+ADMIN_ONLY_TABLES = {"users"}
+
+# Row filters for the current user, per table
+TABLE_SCOPES = {
+    "animals": scope_animals,
+    "observations": scope_observations,
+    "users": scope_tenant,
+}
+
+def _encode_rows(rows: list, compact: bool):
+    """Return rows as-is, or column-major when the client asked for compact output."""
+    if not compact:
+        return rows
+    columns = list(rows[0].keys()) if rows else []
+    return {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+
+def _fetch_changes(supabase, user: dict, table: str, cursor: str, limit: int):
+    """Rows changed after `cursor` ("<updated_at>|<id>"), ordered so pages never skip ties."""
+    query = supabase.table(table).select(SYNC_TABLES[table])
+    if table in TABLE_SCOPES:
+        query = TABLE_SCOPES[table](query, user)
+    updated_at, _, row_id = cursor.partition("|")
+    query = after_cursor(query, "updated_at", updated_at, row_id)
+    result = query.order("updated_at").order("id").limit(limit).execute()
+    rows = result.data or []
+    next_cursor = f"{rows[-1]['updated_at']}|{rows[-1]['id']}" if rows else cursor
+    return rows, next_cursor
+
+def _fetch_tombstones(supabase, user: dict, tables: list, cursor: str, limit: int):
+    """Deletions after ``cursor`` (a tombstone ``seq``) from the user's zoos."""
+    query = scope_tenant(supabase.table("deleted_records").select("seq, table_name, record_id, deleted_at"), user)
+    if cursor:
+        query = query.gt("seq", int(cursor))
+    result = query.in_("table_name", tables).order("seq").limit(limit).execute()
+    rows = result.data or []
+    next_cursor = str(rows[-1]["seq"]) if rows else cursor
+    return rows, next_cursor
+
+@router.post("/")
+async def sync_changes(sync_request: SyncRequest, current_user: dict = Depends(get_current_user)):
+    """Return rows inserted, updated or deleted since the client's per-table cursors.
+
+    Clients start with empty cursors, store the returned ones and keep calling
+    while any table reports ``has_more``.
+    """
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    requested = sync_request.tables or list(SYNC_TABLES)
+    unknown = [t for t in requested if t not in SYNC_TABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sync tables: {', '.join(unknown)}")
+    if current_user["role"] != "admin":
+        requested = [t for t in requested if t not in ADMIN_ONLY_TABLES]
+    deleted_since = sync_request.since.get("deleted", "")
+    if deleted_since and not (deleted_since.isascii() and deleted_since.isdigit()):
+        raise HTTPException(status_code=400, detail="Invalid deleted cursor")
+
+    limit = sync_request.limit
+    tables = {}
+    for table in requested:
+        rows, cursor = _fetch_changes(supabase, current_user, table, sync_request.since.get(table, ""), limit)
+        tables[table] = {
+            "rows": _encode_rows(rows, sync_request.compact),
+            "cursor": cursor,
+            "has_more": len(rows) == limit,
+        }
+
+    tombstones, deleted_cursor = _fetch_tombstones(supabase, current_user, requested, deleted_since, limit)
+    deleted = {}
+    for tombstone in tombstones:
+        deleted.setdefault(tombstone["table_name"], []).append(tombstone["record_id"])
+
+    return {
+        "tables": tables,
+        "deleted": {
+            "ids": deleted,
+            "cursor": deleted_cursor,
+            "has_more": len(tombstones) == limit,
+        },
+    }
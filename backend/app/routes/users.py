@@ -1,15 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from app.models.schemas import User, UserCreate
 from app.routes.auth import get_current_user, get_password_hash
 from app.database import get_supabase
+from app.cache import invalidate
+from app.compression import cached_list_response
+from app.scoping import scope_key, scope_tenant
+from app.tenancy import resolve_zoo_id, tenant_zoo_ids
+from app.tracing import span
 from typing import List
 import uuid
 from datetime import datetime
 
 router = APIRouter()
 
+def _list_users(supabase, user: dict):
+    with span("db_read", table="users"):
+        result = scope_tenant(
+            supabase.table("users").select("id, email, name, role, zoo_id, created_at, updated_at"), user
+        ).execute()
+    return [User.model_validate(row) for row in result.data]
+
 @router.get("/", response_model=List[User])
-async def get_users(current_user: dict = Depends(get_current_user)):
+async def get_users(request: Request, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Only admins can view all users")
     
@@ -17,8 +29,10 @@ async def get_users(current_user: dict = Depends(get_current_user)):
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
-    result = supabase.table("users").select("id, email, name, role, created_at, updated_at").execute()
-    return result.data
+    return await cached_list_response(
+        request, f"users:{scope_key(current_user)}", ("users",), _list_users, supabase, current_user,
+        zoo_ids=tenant_zoo_ids(current_user)
+    )
 
 @router.post("/", response_model=User)
 async def create_user(
@@ -42,11 +56,13 @@ async def create_user(
         "name": user_data.name,
         "role": user_data.role.value,
         "password_hash": get_password_hash(user_data.password),
+        "zoo_id": resolve_zoo_id(current_user, user_data.zoo_id),
         "created_at": datetime.utcnow().isoformat(),
         "updated_at": datetime.utcnow().isoformat()
     }
     
     result = supabase.table("users").insert(new_user).execute()
+    invalidate("users", zoo_id=new_user["zoo_id"])
     user_response = result.data[0].copy()
     user_response.pop("password_hash", None)
     return user_response
@@ -64,10 +80,11 @@ async def update_user_role(
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
-    result = supabase.table("users").update({
+    result = scope_tenant(supabase.table("users").update({
         "role": role_data["role"],
         "updated_at": datetime.utcnow().isoformat()
-    }).eq("id", user_id).execute()
+    }).eq("id", user_id), current_user).execute()
+    invalidate("users", zoo_id=result.data[0].get("zoo_id") if result.data else None)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -91,7 +108,8 @@ async def delete_user(
     if not supabase:
         raise HTTPException(status_code=500, detail="Database not configured")
     
-    result = supabase.table("users").delete().eq("id", user_id).execute()
+    result = scope_tenant(supabase.table("users").delete().eq("id", user_id), current_user).execute()
+    invalidate("users", zoo_id=result.data[0].get("zoo_id") if result.data else None)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
@@ -0,0 +1,135 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.models.schemas import Zoo, ZooCreate, ZooLevel
+from app.routes.auth import get_current_user
+from app.database import get_supabase
+from app.cache import dashboard_cache, invalidate
+from app.tenancy import tenant_zoo_ids, zoo_directory
+from app.tracing import span
+from typing import List
+import uuid
+from datetime import datetime, timedelta
+
+router = APIRouter()
+
+ROLLUP_TABLES = ("zoos", "animals", "observations", "emergency_alerts")
+ROLLUP_COUNTS = ("animals", "animals_needing_attention", "observations", "emergencies", "active_alerts")
+
+def _check_zoo_access(user: dict, zoo_id: str):
+    allowed = tenant_zoo_ids(user)
+    if allowed is not None and zoo_id not in allowed:
+        raise HTTPException(status_code=403, detail="Not authorized for this zoo")
+
+def _rollup(supabase, zoo_id: str, zoo_ids: tuple, since: str):
+    """Totals per enclosure, summed up through each zoo to ``zoo_id``."""
+    rows = supabase.rpc("zoo_rollup", {"zoo_ids": list(zoo_ids), "since": since}).execute().data or []
+    alerts = (
+        supabase.table("emergency_alerts").select("zoo_id")
+        .eq("resolved", False).in_("zoo_id", list(zoo_ids)).execute().data or []
+    )
+
+    enclosures: dict[str, list] = {}
+    for row in rows:
+        enclosures.setdefault(row["zoo_id"], []).append({
+            "enclosure": row["enclosure"],
+            **{count: row[count] for count in ROLLUP_COUNTS if count in row},
+        })
+    active_alerts: dict[str, int] = {}
+    for alert in alerts:
+        active_alerts[alert["zoo_id"]] = active_alerts.get(alert["zoo_id"], 0) + 1
+
+    def node(zoo: dict, seen: set) -> dict:
+        seen.add(zoo["id"])
+        children = [node(child, seen) for child in zoo_directory.children(zoo["id"]) if child["id"] not in seen]
+        own = enclosures.get(zoo["id"], [])
+        totals = {count: sum(e.get(count, 0) for e in own) for count in ROLLUP_COUNTS}
+        totals["active_alerts"] = active_alerts.get(zoo["id"], 0)
+        for child in children:
+            for count in ROLLUP_COUNTS:
+                totals[count] += child["totals"][count]
+        return {
+            "id": zoo["id"],
+            "name": zoo["name"],
+            "level": zoo["level"],
+            "totals": totals,
+            "enclosures": sorted(own, key=lambda e: e["enclosure"]),
+            "children": children,
+        }
+
+    return node(zoo_directory.get(zoo_id), set())
+
+@router.get("/", response_model=List[Zoo])
+async def get_zoos(current_user: dict = Depends(get_current_user)):
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    query = supabase.table("zoos").select("*")
+    zoo_ids = tenant_zoo_ids(current_user)
+    if zoo_ids is not None:
+        query = query.in_("id", list(zoo_ids))
+    with span("db_read", table="zoos"):
+        result = query.order("name").execute()
+    return result.data or []
+
+@router.post("/", response_model=Zoo)
+async def create_zoo(zoo_data: ZooCreate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can create zoos")
+
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+
+    if zoo_data.parent_id:
+        _check_zoo_access(current_user, zoo_data.parent_id)
+        parent = zoo_directory.get(zoo_data.parent_id)
+        if not parent:
+            raise HTTPException(status_code=400, detail="Parent zoo not found")
+        if parent["level"] != ZooLevel.REGION.value:
+            raise HTTPException(status_code=400, detail="Zoos can only be placed under a region")
+    elif current_user.get("zoo_id"):
+        raise HTTPException(status_code=403, detail="Not authorized to create top-level zoos")
+
+    new_zoo = {
+        "id": str(uuid.uuid4()),
+        "name": zoo_data.name,
+        "level": zoo_data.level.value,
+        "parent_id": zoo_data.parent_id,
+        "created_at": datetime.utcnow().isoformat(),
+        "updated_at": datetime.utcnow().isoformat()
+    }
+
+    with span("db_write", table="zoos"):
+        result = supabase.table("zoos").insert(new_zoo).execute()
+    invalidate("zoos")
+    return result.data[0]
+
+@router.get("/{zoo_id}/rollup")
+async def get_zoo_rollup(zoo_id: str, days: int = 7, current_user: dict = Depends(get_current_user)):
+    """Animal, observation and alert totals for a zoo or region, enclosure → zoo → region."""
+    if current_user["role"] not in ["admin", "officer", "vet"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    _check_zoo_access(current_user, zoo_id)
+
+    supabase = get_supabase()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    if not zoo_directory.get(zoo_id):
+        raise HTTPException(status_code=404, detail="Zoo not found")
+
+    days = max(1, min(days, 365))
+    today = datetime.utcnow().date()
+    since = (today - timedelta(days=days)).isoformat()
+    zoo_ids = zoo_directory.subtree(zoo_id)
+    with span("zoo_rollup", zoos=len(zoo_ids)):
+        rollup = await dashboard_cache.get_or_compute(
+            f"rollup:{zoo_id}:{days}:{today.isoformat()}",
+            ROLLUP_TABLES,
+            _rollup,
+            supabase,
+            zoo_id,
+            zoo_ids,
+            since,
+            zoo_ids=zoo_ids
+        )
+    return {"since": since, "days": days, **rollup}
@@ -0,0 +1,47 @@
+from typing import Optional
+from app.models.schemas import UserRole
+from app.tenancy import tenant_zoo_ids
+
+# Users bound to a zoo or region only see rows from that zoo and the zoos
+# below it. On top of that, zookeepers only see the animals assigned to them
+# and the observations they recorded. These helpers turn the current user
+# into query predicates, so the database does the filtering, and give each
+# scope a key for anything cached per scope.
+
+
+def is_scoped(user: dict) -> bool:
+    return user["role"] == UserRole.ZOOKEEPER.value
+
+
+def scope_key(user: dict) -> str:
+    """Cache key part that is the same for every user who sees the same rows."""
+    tenant = f"zoo:{user['zoo_id']}" if user.get("zoo_id") else "zoo:*"
+    return f"{tenant}|keeper:{user['id']}" if is_scoped(user) else f"{tenant}|all"
+
+
+def scope_tenant(query, user: dict, column: str = "zoo_id"):
+    zoo_ids = tenant_zoo_ids(user)
+    if zoo_ids is None:
+        return query
+    if len(zoo_ids) == 1:
+        return query.eq(column, zoo_ids[0])
+    return query.in_(column, list(zoo_ids))
+
+
+def scope_animals(query, user: dict):
+    query = scope_tenant(query, user)
+    if is_scoped(user):
+        return query.eq("assigned_to", user["id"])
+    return query
+
+
+def scope_observations(query, user: dict):
+    query = scope_tenant(query, user)
+    if is_scoped(user):
+        return query.eq("zookeeper_id", user["id"])
+    return query
+
+
+def observation_owner(user: dict) -> Optional[str]:
+    """``zookeeper_id`` a user's observation reads are limited to, or ``None`` for all."""
+    return user["id"] if is_scoped(user) else None
@@ -0,0 +1,303 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from app.worker_bus import worker_bus
+
+# Observation fields that are searchable free text
+SEARCH_FIELDS = (
+    "normal_behaviour_details",
+    "other_animal_requirements",
+    "transcript",
+    "vet_comments",
+)
+# Everything ``ObservationSearchIndex.add`` reads from a row
+INDEX_COLUMNS = ("id", "animal_id", "zookeeper_id", "zoo_id", "date_or_day", "is_emergency", "created_at") + SEARCH_FIELDS
+
+# Danda (U+0964/0965) separates sentences, so it is left out of the token class
+_TOKEN_RE = re.compile(r"[0-9a-z\u0900-\u0963\u0966-\u097f]+")
+_DEVANAGARI_RE = re.compile(r"[\u0900-\u097f]")
+# Nukta, ZWJ/ZWNJ are dropped and chandrabindu folded into anusvara, since
+# keepers type these inconsistently
+_FOLD = str.maketrans({"\u093c": None, "\u200c": None, "\u200d": None, "\u0901": "\u0902"})
+
+# ----------------------------
+# Devanagari -> Latin
+# ----------------------------
+_VOWELS = {
+    "अ": "a", "आ": "a", "इ": "i", "ई": "i", "उ": "u", "ऊ": "u", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+_MATRAS = {
+    "ा": "a", "ि": "i", "ी": "i", "ु": "u", "ू": "u", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o",
+}
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n", "च": "ch", "छ": "chh", "ज": "j",
+    "झ": "jh", "ञ": "n", "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n", "त": "t",
+    "थ": "th", "द": "d", "ध": "dh", "न": "n", "प": "p", "फ": "ph", "ब": "b", "भ": "bh",
+    "म": "m", "य": "y", "र": "r", "ल": "l", "व": "v", "श": "sh", "ष": "sh", "स": "s",
+    "ह": "h",
+}
+_VIRAMA = "्"
+_ANUSVARA = "ं"
+_VISARGA = "ः"
+_DIGITS = {chr(0x0966 + i): str(i) for i in range(10)}
+
+
+def transliterate(token: str) -> str:
+    """Loose Hinglish romanisation so "langdapan" can find "लंगड़ापन"."""
+    out = []
+    for i, ch in enumerate(token):
+        if ch in _CONSONANTS:
+            out.append(_CONSONANTS[ch])
+            nxt = token[i + 1] if i + 1 < len(token) else ""
+            if nxt not in _MATRAS and nxt != _VIRAMA:
+                out.append("a")
+        elif ch in _MATRAS:
+            out.append(_MATRAS[ch])
+        elif ch in _VOWELS:
+            out.append(_VOWELS[ch])
+        elif ch == _ANUSVARA:
+            out.append("n")
+        elif ch == _VISARGA:
+            out.append("h")
+        elif ch in _DIGITS:
+            out.append(_DIGITS[ch])
+        elif ch != _VIRAMA:
+            out.append(ch)
+    text = "".join(out)
+    # Hindi drops the final inherent vowel when spoken
+    if len(text) > 2 and token[-1] in _CONSONANTS and text.endswith("a"):
+        text = text[:-1]
+    return text
+
+
+def tokenize(text: str) -> list:
+    text = unicodedata.normalize("NFC", text or "").lower().translate(_FOLD)
+    return _TOKEN_RE.findall(text)
+
+
+def index_terms(text: str) -> list:
+    """Tokens plus a Latin twin for every Devanagari token."""
+    terms = []
+    for token in tokenize(text):
+        terms.append(token)
+        if _DEVANAGARI_RE.search(token):
+            roman = transliterate(token)
+            if roman and roman != token:
+                terms.append(roman)
+    return terms
+
+
+def char_ngrams(term: str, n: int = 3) -> set:
+    padded = f"^{term}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def _timestamp(value) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+# ----------------------------
+# Inverted index
+# ----------------------------
+class ObservationSearchIndex:
+    """In-memory BM25 index over observation free text.
+
+    Exact terms are looked up directly. Each query term is also expanded to
+    indexed terms with similar character trigrams, so misspellings and
+    Latin-script spellings of Hindi words still match, at a lower weight.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    FUZZY_MIN_SIMILARITY = 0.45
+    FUZZY_MAX_EXPANSIONS = 8
+    # A term this common is taken to be spelled right and is not expanded
+    FUZZY_SKIP_DOC_FREQ = 50
+    # Very common terms only score their most recently indexed documents
+    # that pass the query's filters, which bounds the scoring work however
+    # large the index grows
+    MAX_POSTINGS_PER_TERM = 10000
+
+    def __init__(self):
+        self._postings: dict[str, dict[str, int]] = {}
+        self._grams: dict[str, set] = {}
+        self._doc_terms: dict[str, Counter] = {}
+        self._doc_meta: dict[str, dict] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, observation: dict):
+        """Index (or re-index) one observation row."""
+        text = " ".join(str(observation.get(field) or "") for field in SEARCH_FIELDS)
+        meta = {
+            "animal_id": observation.get("animal_id"),
+            "zookeeper_id": observation.get("zookeeper_id"),
+            "zoo_id": observation.get("zoo_id"),
+            "date_or_day": observation.get("date_or_day"),
+            "is_emergency": bool(observation.get("is_emergency")),
+            "created_at": observation.get("created_at"),
+            "created_ts": _timestamp(observation.get("created_at")),
+        }
+        with self._lock:
+            self._remove(observation["id"])
+            self._insert(observation["id"], Counter(index_terms(text)), meta)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _insert(self, doc_id: str, terms: Counter, meta: dict):
+        meta["length"] = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_meta[doc_id] = meta
+        self._total_length += meta["length"]
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                for gram in char_ngrams(term):
+                    self._grams.setdefault(gram, set()).add(term)
+            postings[doc_id] = tf
+
+    def _remove(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        meta = self._doc_meta.pop(doc_id)
+        self._total_length -= meta["length"]
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                for gram in char_ngrams(term):
+                    bucket = self._grams.get(gram)
+                    if bucket is not None:
+                        bucket.discard(term)
+                        if not bucket:
+                            del self._grams[gram]
+
+    def _expand(self, term: str) -> dict:
+        """Indexed terms to score for one query term, with their weights."""
+        weights = {}
+        if term in self._postings:
+            weights[term] = 1.0
+            if len(self._postings[term]) >= self.FUZZY_SKIP_DOC_FREQ:
+                return weights
+        query_grams = char_ngrams(term)
+        overlap = Counter()
+        for gram in query_grams:
+            for candidate in self._grams.get(gram, ()):
+                overlap[candidate] += 1
+        scored = []
+        for candidate, shared in overlap.items():
+            if candidate == term:
+                continue
+            similarity = 2 * shared / (len(query_grams) + len(char_ngrams(candidate)))
+            if similarity >= self.FUZZY_MIN_SIMILARITY:
+                scored.append((similarity, candidate))
+        for similarity, candidate in heapq.nlargest(self.FUZZY_MAX_EXPANSIONS, scored):
+            weights[candidate] = max(weights.get(candidate, 0.0), similarity * 0.8)
+        return weights
+
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               since: Optional[datetime] = None, zookeeper_id: Optional[str] = None,
+               zoo_ids: Optional[tuple] = None) -> dict:
+        """Ranked hits for ``query``, optionally only observations created after ``since``,
+        recorded by one zookeeper or belonging to ``zoo_ids``."""
+        since_ts = since.timestamp() if since else None
+        zoo_ids = set(zoo_ids) if zoo_ids is not None else None
+        with self._lock:
+            expanded = {}
+            for term in set(index_terms(query)):
+                for indexed, weight in self._expand(term).items():
+                    expanded[indexed] = max(expanded.get(indexed, 0.0), weight)
+
+            doc_count = len(self._doc_terms) or 1
+            avg_length = (self._total_length / doc_count) or 1.0
+            scores: dict[str, float] = {}
+            matched = set()
+            truncated = False
+            for term, weight in expanded.items():
+                postings = self._postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                scored = 0
+                # Postings keep insertion order, so reversed() walks newest first.
+                # Filters run before the cap, so a narrow filter is never starved
+                # by other users' or zoos' documents.
+                for doc_id, tf in reversed(postings.items()):
+                    meta = self._doc_meta[doc_id]
+                    if since_ts is not None and (meta["created_ts"] is None or meta["created_ts"] < since_ts):
+                        continue
+                    if zookeeper_id is not None and meta["zookeeper_id"] != zookeeper_id:
+                        continue
+                    if zoo_ids is not None and meta["zoo_id"] not in zoo_ids:
+                        continue
+                    matched.add(doc_id)
+                    if scored >= self.MAX_POSTINGS_PER_TERM:
+                        truncated = True
+                        continue
+                    scored += 1
+                    norm = tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * meta["length"] / avg_length))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * norm
+
+            top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: item[1])[offset:]
+            hits = []
+            for doc_id, score in top:
+                meta = self._doc_meta[doc_id]
+                hits.append({
+                    "id": doc_id,
+                    "score": round(score, 4),
+                    "animal_id": meta["animal_id"],
+                    "date_or_day": meta["date_or_day"],
+                    "is_emergency": meta["is_emergency"],
+                    "created_at": meta["created_at"],
+                })
+        # total counts every matching document, including any the cap left unscored
+        return {"total": len(matched), "truncated": truncated, "hits": hits}
+
+    def build_from_database(self, supabase, page_size: int = 1000):
+        """Index every stored observation, one page at a time."""
+        columns = ", ".join(INDEX_COLUMNS)
+        start = 0
+        while True:
+            result = supabase.table("observations").select(columns).order("id").range(start, start + page_size - 1).execute()
+            rows = result.data or []
+            for row in rows:
+                self.add(row)
+            if len(rows) < page_size:
+                break
+            start += page_size
+
+
+search_index = ObservationSearchIndex()
+
+
+def index_observation(observation: dict):
+    """Index (or re-index) a row here and in every other worker's index."""
+    search_index.add(observation)
+    worker_bus.publish("index", {column: observation.get(column) for column in INDEX_COLUMNS})
+
+
+worker_bus.subscribe("index", search_index.add)
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from typing import Optional
+from fastapi import HTTPException
+from app.database import get_supabase
+from app.cache import table_versions
+
+ZOO_DIRECTORY_TTL_SECONDS = float(os.environ.get("ZOO_DIRECTORY_TTL_SECONDS", "300"))
+
+
+class ZooDirectory:
+    """The region/zoo hierarchy, held in memory.
+
+    The zoos table is small, so it is loaded whole and reloaded after a write
+    to it by any worker of this server, or after ``ttl`` seconds for writes
+    made outside the API.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._zoos: dict[str, dict] = {}
+        self._children: dict[Optional[str], list] = {}
+        self._loaded_version = None
+        self._expires_at = 0.0
+
+    def _refresh(self):
+        version = table_versions("zoos")
+        if version == self._loaded_version and time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if version == self._loaded_version and time.monotonic() < self._expires_at:
+                return
+            supabase = get_supabase()
+            if not supabase:
+                return
+            rows = supabase.table("zoos").select("id, name, level, parent_id").execute().data or []
+            children = {}
+            for row in rows:
+                children.setdefault(row.get("parent_id"), []).append(row["id"])
+            self._zoos = {row["id"]: row for row in rows}
+            self._children = children
+            self._loaded_version = version
+            self._expires_at = time.monotonic() + self.ttl
+
+    def get(self, zoo_id: str) -> Optional[dict]:
+        self._refresh()
+        return self._zoos.get(zoo_id)
+
+    def children(self, zoo_id: Optional[str]) -> list:
+        self._refresh()
+        return [self._zoos[child] for child in self._children.get(zoo_id, [])]
+
+    def subtree(self, zoo_id: str) -> tuple:
+        """``zoo_id`` and every zoo below it, sorted so it can serve as a key."""
+        self._refresh()
+        seen = {zoo_id}
+        stack = [zoo_id]
+        while stack:
+            for child in self._children.get(stack.pop(), []):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        return tuple(sorted(seen))
+
+
+zoo_directory = ZooDirectory(ZOO_DIRECTORY_TTL_SECONDS)
+
+
+def tenant_zoo_ids(user: dict) -> Optional[tuple]:
+    """Zoos a user can see: their own zoo or region and everything under it, or ``None`` for all."""
+    zoo_id = user.get("zoo_id")
+    if not zoo_id:
+        return None
+    return zoo_directory.subtree(zoo_id)
+
+
+def resolve_zoo_id(user: dict, requested: Optional[str]) -> Optional[str]:
+    """Zoo a new row created by ``user`` belongs to; defaults to the user's own zoo."""
+    if not requested:
+        return user.get("zoo_id")
+    allowed = tenant_zoo_ids(user)
+    if allowed is not None and requested not in allowed:
+        raise HTTPException(status_code=403, detail="Not authorized for this zoo")
+    return requested
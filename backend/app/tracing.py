@@ -0,0 +1,87 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+OTEL_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTEL_SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "zoocare-api")
+
+# Spans recorded for the request being handled. Context variables follow the
+# request into the thread pool, so spans from blocking code land here too.
+_current_spans: ContextVar[Optional[list]] = ContextVar("current_spans", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a stage of the current request; a no-op outside of one."""
+    spans = _current_spans.get()
+    if spans is None:
+        yield
+        return
+    start_ns = time.time_ns()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append({
+            "name": name,
+            "start_ns": start_ns,
+            "end_ns": start_ns + int((time.perf_counter() - started) * 1e9),
+            "attributes": attributes,
+        })
+
+
+def start_trace():
+    spans = []
+    return spans, _current_spans.set(spans)
+
+
+def end_trace(token):
+    _current_spans.reset(token)
+
+
+def server_timing(spans: list, total_ms: float) -> str:
+    """``Server-Timing`` value with the time per stage, repeated stages summed."""
+    durations = {}
+    for recorded in spans:
+        metric = re.sub(r"[^\w-]", "_", recorded["name"])
+        durations[metric] = durations.get(metric, 0.0) + (recorded["end_ns"] - recorded["start_ns"]) / 1e6
+    entries = [f"{metric};dur={ms:.1f}" for metric, ms in durations.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+# ----------------------------
+# Optional OpenTelemetry export
+# ----------------------------
+_tracer = None
+if OTEL_ENDPOINT:
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        _provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+        _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{OTEL_ENDPOINT.rstrip('/')}/v1/traces")))
+        _tracer = _provider.get_tracer("app.tracing")
+    except ImportError:
+        print("OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk is not installed; not exporting spans")
+
+
+def export_trace(name: str, start_ns: int, end_ns: int, spans: list, **attributes):
+    """Send the request and its stage spans to the OTLP collector, if one is configured."""
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+
+    root = _tracer.start_span(name, start_time=start_ns, attributes=attributes)
+    parent = trace.set_span_in_context(root)
+    for recorded in spans:
+        child = _tracer.start_span(recorded["name"], context=parent, start_time=recorded["start_ns"],
+                                   attributes={k: str(v) for k, v in recorded["attributes"].items()})
+        child.end(end_time=recorded["end_ns"])
+    root.end(end_time=end_ns)
@@ -0,0 +1,318 @@
+import asyncio
+import fcntl
+import json
+import mimetypes
+import os
+import re
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+
+MEDIA_STORAGE_DIR = os.environ.get("MEDIA_STORAGE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "media"))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_MB", "500")) * 1024 * 1024
+UPLOAD_EXPIRY_SECONDS = int(os.environ.get("UPLOAD_EXPIRY_HOURS", "24")) * 3600
+# Unfinished uploads one user may hold at a time, each reserving up to MAX_UPLOAD_MB
+MAX_OPEN_UPLOADS_PER_USER = int(os.environ.get("MAX_OPEN_UPLOADS_PER_USER", "5"))
+MEDIA_TYPES = ("image", "video")
+WRITE_BUFFER_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 256 * 1024
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(Exception):
+    """Raised for a request that does not fit the upload's current state."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class MediaStore:
+    """Resumable uploads on local disk, tus-style: create, append at offset, finalize.
+
+    Each upload is a ``<id>.part`` file plus a ``<id>.json`` sidecar holding its
+    metadata, so an interrupted client can ask for the current offset and carry
+    on from there, even after a server restart. Finished files move to
+    ``media/<id>.<ext>`` and are served from there with range support.
+
+    Changes to an upload hold a file lock on ``<id>.lock``, so two workers can
+    never write the same upload at once; the second request gets a 409.
+    """
+
+    def __init__(self, root: str):
+        self.uploads_dir = os.path.join(root, "uploads")
+        self.media_dir = os.path.join(root, "media")
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        os.makedirs(self.media_dir, exist_ok=True)
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    # ----------------------------
+    # Paths and metadata
+    # ----------------------------
+    def _check_media_type(self, media_type: str):
+        if media_type not in MEDIA_TYPES:
+            raise UploadError(400, f"media_type must be one of: {', '.join(MEDIA_TYPES)}")
+
+    def _check_id(self, item_id: str):
+        if not _ID_PATTERN.match(item_id):
+            raise UploadError(404, "Upload not found")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_dir, f"{upload_id}.part")
+
+    def _info_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_dir, f"{upload_id}.json")
+
+    def _write_info(self, info: dict):
+        tmp_path = self._info_path(info["id"]) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp_path, self._info_path(info["id"]))
+
+    def info(self, upload_id: str) -> dict:
+        self._check_id(upload_id)
+        try:
+            with open(self._info_path(upload_id)) as f:
+                info = json.load(f)
+        except FileNotFoundError:
+            raise UploadError(404, "Upload not found")
+        if info.get("media_id"):
+            info["offset"] = info["length"]
+        else:
+            # The part file is the source of truth for how much has arrived
+            info["offset"] = os.path.getsize(self._part_path(upload_id))
+        return info
+
+    def _lock_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_dir, f"{upload_id}.lock")
+
+    def _lock(self, upload_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    @contextmanager
+    def _file_lock(self, upload_id: str):
+        self.info(upload_id)  # 404 before leaving a lock file for an unknown id
+        with open(self._lock_path(upload_id), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError(409, "Upload is being changed by another request")
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def _exclusive(self, upload_id: str):
+        """Held while changing an upload, against this process's requests and other workers'."""
+        async with self._lock(upload_id):
+            with self._file_lock(upload_id):
+                yield
+
+    # ----------------------------
+    # Upload protocol
+    # ----------------------------
+    def open_uploads(self, owner: str) -> int:
+        """Unfinished uploads started by ``owner``."""
+        count = 0
+        for name in os.listdir(self.uploads_dir):
+            if not name.endswith(".part"):
+                continue
+            try:
+                if self.info(name[:-len(".part")]).get("owner") == owner:
+                    count += 1
+            except (OSError, ValueError, UploadError):
+                continue
+        return count
+
+    def create(self, observation_id: str, media_type: str, length: int,
+               filename: str = "", content_type: str = "", owner: str = "",
+               zoo_id: Optional[str] = None, zookeeper_id: Optional[str] = None) -> dict:
+        self._check_media_type(media_type)
+        if length <= 0:
+            raise UploadError(400, "Upload-Length must be positive")
+        if length > MAX_UPLOAD_BYTES:
+            raise UploadError(413, f"Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        self.purge_expired()
+        if owner and self.open_uploads(owner) >= MAX_OPEN_UPLOADS_PER_USER:
+            raise UploadError(429, f"At most {MAX_OPEN_UPLOADS_PER_USER} unfinished uploads per user; finish or cancel one first")
+
+        upload_id = uuid.uuid4().hex
+        info = {
+            "id": upload_id,
+            "owner": owner,
+            "observation_id": observation_id,
+            # The observation's zoo and keeper, so reads can be scoped without a lookup
+            "zoo_id": zoo_id,
+            "zookeeper_id": zookeeper_id,
+            "media_type": media_type,
+            "length": length,
+            "filename": filename,
+            "content_type": content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "created_at": time.time(),
+        }
+        open(self._part_path(upload_id), "wb").close()
+        self._write_info(info)
+        info["offset"] = 0
+        return info
+
+    async def append(self, upload_id: str, offset: int, chunks) -> int:
+        """Write a request body stream at ``offset`` and return the new offset."""
+        async with self._exclusive(upload_id):
+            info = self.info(upload_id)
+            if info.get("media_id"):
+                raise UploadError(409, "Upload already finalized")
+            if offset != info["offset"]:
+                raise UploadError(409, f"Upload-Offset mismatch, server has {info['offset']}")
+
+            written = offset
+            buffer = bytearray()
+            with open(self._part_path(upload_id), "ab") as f:
+                try:
+                    async for chunk in chunks:
+                        written += len(chunk)
+                        if written > info["length"]:
+                            raise UploadError(413, "Chunk exceeds the declared Upload-Length")
+                        buffer += chunk
+                        if len(buffer) >= WRITE_BUFFER_BYTES:
+                            await run_in_threadpool(f.write, bytes(buffer))
+                            buffer.clear()
+                finally:
+                    # Keep whatever arrived before a dropped connection so the
+                    # client can resume from there
+                    if buffer:
+                        keep = bytes(buffer[: max(0, info["length"] - (written - len(buffer)))])
+                        await run_in_threadpool(f.write, keep)
+            return os.path.getsize(self._part_path(upload_id))
+
+    async def finalize(self, upload_id: str) -> dict:
+        async with self._exclusive(upload_id):
+            info = self.info(upload_id)
+            if info.get("media_id"):
+                return info
+            if info["offset"] != info["length"]:
+                raise UploadError(409, f"Upload incomplete: {info['offset']} of {info['length']} bytes")
+
+            info["media_id"] = upload_id
+            info["path"] = self._media_path_for(upload_id, info["filename"], info["content_type"])
+            await run_in_threadpool(os.replace, self._part_path(upload_id), info["path"])
+            self._write_info(info)
+            # A finalized upload never changes again
+            os.remove(self._lock_path(upload_id))
+        self._locks.pop(upload_id, None)
+        return info
+
+    def terminate(self, upload_id: str):
+        with self._file_lock(upload_id):
+            info = self.info(upload_id)
+            if info.get("media_id"):
+                raise UploadError(409, "Upload already finalized")
+            for path in (self._part_path(upload_id), self._info_path(upload_id), self._lock_path(upload_id)):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._locks.pop(upload_id, None)
+
+    def save_file(self, observation_id: str, media_type: str, fileobj,
+                  filename: str = "", content_type: str = "", owner: str = "",
+                  zoo_id: Optional[str] = None, zookeeper_id: Optional[str] = None) -> dict:
+        """Single-request upload, copied to disk in chunks rather than read into memory."""
+        self._check_media_type(media_type)
+        media_id = uuid.uuid4().hex
+        path = self._media_path_for(media_id, filename, content_type)
+        written = 0
+        with open(path, "wb") as out:
+            while True:
+                chunk = fileobj.read(READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > MAX_UPLOAD_BYTES:
+                    out.close()
+                    os.remove(path)
+                    raise UploadError(413, f"Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+                out.write(chunk)
+        info = {
+            "id": media_id,
+            "media_id": media_id,
+            "owner": owner,
+            "observation_id": observation_id,
+            # The observation's zoo and keeper, so reads can be scoped without a lookup
+            "zoo_id": zoo_id,
+            "zookeeper_id": zookeeper_id,
+            "media_type": media_type,
+            "length": os.path.getsize(path),
+            "filename": filename,
+            "content_type": content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "created_at": time.time(),
+            "path": path,
+        }
+        self._write_info(info)
+        return info
+
+    def purge_expired(self):
+        """Drop unfinished uploads nobody has touched for UPLOAD_EXPIRY_HOURS."""
+        cutoff = time.time() - UPLOAD_EXPIRY_SECONDS
+        for name in os.listdir(self.uploads_dir):
+            if not name.endswith(".part"):
+                continue
+            upload_id = name[:-len(".part")]
+            part_path = self._part_path(upload_id)
+            try:
+                if os.path.getmtime(part_path) >= cutoff or self.info(upload_id).get("media_id"):
+                    continue
+                self.terminate(upload_id)
+            except (OSError, UploadError):
+                continue
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def _media_path_for(self, media_id: str, filename: str, content_type: str) -> str:
+        ext = os.path.splitext(filename)[1].lower()
+        if not re.match(r"^\.[a-z0-9]{1,8}$", ext):
+            ext = mimetypes.guess_extension(content_type or "") or ".bin"
+        return os.path.join(self.media_dir, f"{media_id}{ext}")
+
+    def media(self, media_id: str) -> dict:
+        info = self.info(media_id)
+        if not info.get("media_id") or not os.path.exists(info["path"]):
+            raise UploadError(404, "Media not found")
+        return info
+
+    def iter_range(self, path: str, start: int, end: int):
+        """Yield bytes ``start``..``end`` inclusive from ``path``."""
+        remaining = end - start + 1
+        with open(path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(READ_CHUNK_BYTES, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+def parse_range(range_header: str, size: int):
+    """Parse a single ``bytes=`` range into inclusive (start, end), or None for the whole file."""
+    if not range_header:
+        return None
+    match = re.match(r"^bytes=(\d*)-(\d*)$", range_header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        raise UploadError(416, "Unsupported Range header")
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(0, size - int(last))
+        end = size - 1
+    if start > end or start >= size:
+        raise UploadError(416, "Requested range not satisfiable")
+    return start, end
+
+
+media_store = MediaStore(MEDIA_STORAGE_DIR)
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+WORKER_STATE_PATH = os.environ.get(
+    "WORKER_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "worker_state.sqlite3"),
+)
+WORKER_BUS_POLL_SECONDS = float(os.environ.get("WORKER_BUS_POLL_SECONDS", "0.2"))
+# Events only need to outlive the slowest worker's poll
+WORKER_BUS_RETAIN_SECONDS = 300
+PRUNE_EVERY_EXCHANGES = 500
+
+
+class WorkerBus:
+    """State shared by the worker processes of one server, in a local SQLite file.
+
+    Workers publish events (cache invalidations, search index updates, SOS
+    alerts) that every other worker picks up within ``poll_seconds``, and
+    claim idempotency keys so a retry that reaches another worker replays
+    the first response instead of running again.
+
+    ``publish`` only queues the event in memory. A background task writes
+    the queue and reads other workers' events on a thread of its own, so
+    neither the event loop nor the shared thread pool waits on the file.
+    """
+
+    def __init__(self, path: str, poll_seconds: float):
+        self.path = path
+        self.poll_seconds = poll_seconds
+        # Reserved for the bus, like the emergency lane's executors
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-bus")
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._origin = None
+        self._outbox = deque()
+        self._handlers: dict[str, list] = {}
+        self._last_id = None
+        self._exchanges = 0
+        self._task = None
+        self.published = 0
+        self.received = 0
+        self.failed_exchanges = 0
+
+    # ----------------------------
+    # Connection
+    # ----------------------------
+    def _connect(self) -> sqlite3.Connection:
+        # Opened per process: with a preloading server this module is imported
+        # before the workers fork, and a connection must not cross the fork
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, kind TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, result TEXT, "
+                "claimed_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+            self._origin = f"{os.getpid()}:{uuid.uuid4().hex}"
+        return self._conn
+
+    # ----------------------------
+    # Events
+    # ----------------------------
+    def subscribe(self, kind: str, handler):
+        """Call ``handler(payload)`` on the event loop for every ``kind`` event from another worker."""
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def publish(self, kind: str, payload):
+        """Queue an event for the other workers; safe to call from any thread."""
+        self._outbox.append((kind, json.dumps(payload, default=str)))
+
+    def _take_outbox(self) -> list:
+        batch = []
+        while self._outbox:
+            batch.append(self._outbox.popleft())
+        return batch
+
+    def _exchange(self) -> list:
+        """Write queued events and return the other workers' new ones."""
+        batch = self._take_outbox()
+        try:
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                if self._last_id is None:
+                    self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+                if batch:
+                    conn.executemany(
+                        "INSERT INTO events (origin, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                        [(self._origin, kind, payload, now) for kind, payload in batch],
+                    )
+                    self.published += len(batch)
+                    batch = []
+                rows = conn.execute(
+                    "SELECT id, origin, kind, payload FROM events WHERE id > ? ORDER BY id", (self._last_id,)
+                ).fetchall()
+                self._exchanges += 1
+                if self._exchanges % PRUNE_EVERY_EXCHANGES == 0:
+                    conn.execute("DELETE FROM events WHERE created_at < ?", (now - WORKER_BUS_RETAIN_SECONDS,))
+                    conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+        finally:
+            # Kept for the next exchange if the write failed
+            self._outbox.extendleft(reversed(batch))
+        if rows:
+            self._last_id = rows[-1][0]
+        events = [(kind, json.loads(payload)) for _, origin, kind, payload in rows if origin != self._origin]
+        self.received += len(events)
+        return events
+
+    def _dispatch(self, events: list):
+        for kind, payload in events:
+            for handler in self._handlers.get(kind, ()):
+                try:
+                    handler(payload)
+                except Exception as e:
+                    print(f"Worker bus handler for {kind} failed: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                events = await loop.run_in_executor(self.executor, self._exchange)
+            except Exception as e:
+                self.failed_exchanges += 1
+                print(f"Worker bus exchange failed: {e}")
+                continue
+            self._dispatch(events)
+
+    def start(self):
+        if self._task is not None:
+            return
+        # Only events published from now on are delivered here; anything
+        # older is already in the database this worker loads at startup
+        try:
+            self._exchange()
+        except Exception as e:
+            print(f"Worker bus unavailable at startup, will keep trying: {e}")
+        self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Hand the last invalidations to the workers that keep running
+        try:
+            self._exchange()
+        except Exception as e:
+            print(f"Worker bus final exchange failed: {e}")
+
+    # ----------------------------
+    # Idempotency keys
+    # ----------------------------
+    def claim(self, key: str, fingerprint: str, ttl: float, abandon_after: float) -> tuple:
+        """Try to become the one worker that runs ``key``.
+
+        Returns ``("claimed", None)``, ``("done", result)`` with the stored JSON
+        result, ``("running", None)`` while another worker has it, or
+        ``("mismatch", None)`` when the key was used for a different request.
+        A claim older than ``abandon_after`` seconds without a result is
+        taken over, since its worker has died.
+        """
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND expires_at <= ?", (key, now))
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO idempotency (key, fingerprint, result, claimed_at, expires_at) "
+                "VALUES (?, ?, NULL, ?, ?)",
+                (key, fingerprint, now, now + ttl),
+            ).rowcount
+            if inserted:
+                return "claimed", None
+            row = conn.execute(
+                "SELECT fingerprint, result, claimed_at FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return "running", None  # released between the insert and the read
+            stored_fingerprint, result, claimed_at = row
+            if stored_fingerprint != fingerprint:
+                return "mismatch", None
+            if result is not None:
+                return "done", result
+            if claimed_at <= now - abandon_after:
+                conn.execute("UPDATE idempotency SET claimed_at = ? WHERE key = ?", (now, key))
+                return "claimed", None
+            return "running", None
+
+    def complete(self, key: str, result: str):
+        with self._lock:
+            self._connect().execute("UPDATE idempotency SET result = ? WHERE key = ?", (result, key))
+
+    def release(self, key: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM idempotency WHERE key = ? AND result IS NULL", (key,))
+
+    def stats(self) -> dict:
+        return {
+            "poll_seconds": self.poll_seconds,
+            "queued": len(self._outbox),
+            "published": self.published,
+            "received": self.received,
+            "failed_exchanges": self.failed_exchanges,
+        }
+
+
+worker_bus = WorkerBus(WORKER_STATE_PATH, WORKER_BUS_POLL_SECONDS)
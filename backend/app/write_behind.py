@@ -0,0 +1,135 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.database import get_supabase
+from app.cache import invalidate
+
+WRITE_BEHIND_FLUSH_ROWS = int(os.environ.get("WRITE_BEHIND_FLUSH_ROWS", "200"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.environ.get("WRITE_BEHIND_FLUSH_SECONDS", "2"))
+
+
+class WriteBehindBuffer:
+    """Coalesce small updates to the same rows and write them in bulk.
+
+    ``put`` merges fields into the pending update for a row and returns at
+    once; a background task applies everything pending through one RPC call
+    every ``flush_seconds``, or sooner once ``flush_rows`` rows are waiting.
+    Updates from a failed flush are kept and retried, and ``stop`` runs a
+    final flush so a clean shutdown loses nothing.
+    """
+
+    def __init__(self, table: str, rpc: str, flush_rows: int, flush_seconds: float):
+        self.table = table
+        self.rpc = rpc
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._pending: dict[str, dict] = {}
+        # Zoo of each pending row, so a flush only refreshes those zoos' caches
+        self._pending_zoos: dict[str, Optional[str]] = {}
+        self._oldest_pending_at = None
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+        self.flushed_rows = 0
+        self.coalesced_updates = 0
+        self.failed_flushes = 0
+        self.last_flush_at = None
+
+    def put(self, row_id: str, fields: dict, zoo_id: Optional[str] = None):
+        with self._lock:
+            self._pending_zoos[row_id] = zoo_id or self._pending_zoos.get(row_id)
+            if row_id in self._pending:
+                self.coalesced_updates += 1
+                self._pending[row_id].update(fields)
+            else:
+                self._pending[row_id] = dict(fields)
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = time.monotonic()
+            full = len(self._pending) >= self.flush_rows
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _take(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            zoos, self._pending_zoos = self._pending_zoos, {}
+            since, self._oldest_pending_at = self._oldest_pending_at, None
+        return batch, zoos, since
+
+    def _restore(self, batch: dict, zoos: dict, since: float):
+        """Put back a batch that failed to write, under any newer updates."""
+        with self._lock:
+            for row_id, fields in batch.items():
+                self._pending[row_id] = {**fields, **self._pending.get(row_id, {})}
+                self._pending_zoos[row_id] = self._pending_zoos.get(row_id) or zoos.get(row_id)
+            if since is not None:
+                self._oldest_pending_at = min(since, self._oldest_pending_at or since)
+
+    def _write(self, batch: dict):
+        supabase = get_supabase()
+        if not supabase:
+            return
+        supabase.rpc(self.rpc, {"updates": [{"id": row_id, **fields} for row_id, fields in batch.items()]}).execute()
+
+    async def flush(self):
+        async with self._flush_lock:
+            batch, zoos, since = self._take()
+            if not batch:
+                return
+            try:
+                await run_in_threadpool(self._write, batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                self._restore(batch, zoos, since)
+                print(f"Error flushing {len(batch)} {self.table} updates, will retry: {e}")
+                return
+            self.flushed_rows += len(batch)
+            self.last_flush_at = time.time()
+            for zoo_id in set(zoos.values()):
+                invalidate(self.table, zoo_id=zoo_id)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let an in-progress flush finish rather than cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+            oldest = self._oldest_pending_at
+        return {
+            "pending_rows": pending,
+            "lag_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            "flushed_rows": self.flushed_rows,
+            "coalesced_updates": self.coalesced_updates,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_at": self.last_flush_at,
+        }
+
+
+animal_status_buffer = WriteBehindBuffer(
+    "animals", "bulk_update_animals", WRITE_BEHIND_FLUSH_ROWS, WRITE_BEHIND_FLUSH_SECONDS
+)
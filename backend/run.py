@@ -1,9 +1,12 @@
+import multiprocessing
+import os
+import sys
 import uvicorn
 from dotenv import load_dotenv
 
 load_dotenv()
 
-if __name__ == "__main__":
+def run_development():
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
@@ -11,3 +14,54 @@ if __name__ == "__main__":
         reload=True,
         log_level="info"
     )
+
+def production_options():
+    """Gunicorn settings for production, each overridable through the environment."""
+    # State that must agree across workers (cache invalidations, search index
+    # updates, SOS fan-out, idempotency keys) goes through app/worker_bus.py
+    # and upload changes hold a file lock, so throughput scales with the cores.
+    workers = int(os.environ.get("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+    return {
+        "bind": f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8000')}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        # Import the app, and with it the Gemini/Deepgram clients, once in the
+        # master so workers fork with it already loaded
+        "preload_app": True,
+        # Recycle workers after a number of requests to contain memory growth;
+        # jitter keeps them from all restarting at once
+        "max_requests": int(os.environ.get("MAX_REQUESTS", "1000")),
+        "max_requests_jitter": int(os.environ.get("MAX_REQUESTS_JITTER", "100")),
+        # On SIGTERM workers stop accepting and get this long to drain
+        "graceful_timeout": int(os.environ.get("GRACEFUL_TIMEOUT", "30")),
+        "timeout": int(os.environ.get("WORKER_TIMEOUT", "120")),
+        "keepalive": int(os.environ.get("KEEPALIVE", "5")),
+        "backlog": int(os.environ.get("BACKLOG", "2048")),
+        "loglevel": os.environ.get("LOG_LEVEL", "info"),
+        "accesslog": "-",
+    }
+
+def run_production():
+    from gunicorn.app.base import BaseApplication
+    from app.main import app
+
+    class ZooCareApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    ZooCareApplication(app, production_options()).run()
+
+if __name__ == "__main__":
+    if "--production" in sys.argv or os.environ.get("APP_ENV") == "production":
+        run_production()
+    else:
+        run_development()
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The app reads its configuration at import time
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("EMERGENCY_WAL_PATH", os.path.join(tempfile.mkdtemp(), "emergency_alerts.wal"))
+os.environ.setdefault("WORKER_STATE_PATH", os.path.join(tempfile.mkdtemp(), "worker_state.sqlite3"))
+os.environ.pop("SUPABASE_URL", None)
+os.environ.pop("SUPABASE_KEY", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
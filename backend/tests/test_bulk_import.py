@@ -0,0 +1,103 @@
+from app.bulk_import import AnimalImporter
+
+
+class _Query:
+    def __init__(self, db):
+        self.db = db
+        self.filters = []
+
+    def select(self, columns):
+        self.op = "select"
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, set(values)))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def upsert(self, rows, on_conflict=""):
+        self.op, self.on_conflict = "upsert", on_conflict.split(",")
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def execute(self):
+        if self.op == "select":
+            rows = [row for row in self.db.rows if all(row.get(c) in values for c, values in self.filters)]
+            return _Result(rows[self.bounds[0]:self.bounds[1] + 1])
+        self.db.upserts.append(self.rows)
+        for row in self.rows:
+            key = tuple(row.get(column) for column in self.on_conflict)
+            # NULLs never match in a unique index
+            match = next((
+                existing for existing in self.db.rows
+                if None not in key and tuple(existing.get(column) for column in self.on_conflict) == key
+            ), None)
+            if match:
+                match.update(row)
+            else:
+                self.db.rows.append({"id": f"new-{len(self.db.rows)}", **row})
+        return _Result(self.rows)
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Database:
+    def __init__(self, rows):
+        self.rows = rows
+        self.upserts = []
+
+    def table(self, name):
+        return _Query(self)
+
+
+def _existing_lion():
+    return {
+        "id": "created-by-create-animal", "zoo_id": "Z1", "species": "Lion", "number": "7",
+        "name": "Leo", "age": "5", "enclosure": "E1", "assigned_to": "keeper-1",
+    }
+
+
+def test_reimport_updates_existing_animal_and_keeps_blank_cells():
+    db = _Database([_existing_lion()])
+    report = AnimalImporter(db, "importer", zoo_id="Z1").run([
+        (2, {"name": "Leo the Great", "species": "Lion", "number": "7", "age": "", "enclosure": "  "}),
+    ])
+
+    assert report["imported"] == 1 and report["failed"] == 0
+    assert db.rows == [{**_existing_lion(), "name": "Leo the Great"}]
+    sent = db.upserts[0][0]
+    assert "age" not in sent and "enclosure" not in sent and "assigned_to" not in sent
+
+
+def test_new_animals_are_assigned_to_the_importer():
+    db = _Database([_existing_lion()])
+    AnimalImporter(db, "importer", zoo_id="Z1").run([
+        (2, {"name": "Cub", "species": "Lion", "number": "8"}),
+        (3, {"name": "Stray", "species": "Lion", "number": ""}),
+        (4, {"name": "Leo", "species": "Lion", "number": "7", "assigned_to": "keeper-2"}),
+    ])
+
+    by_name = {row["name"]: row for row in db.rows}
+    assert by_name["Cub"]["assigned_to"] == "importer"
+    assert by_name["Stray"]["assigned_to"] == "importer" and "number" not in by_name["Stray"]
+    assert by_name["Leo"]["assigned_to"] == "keeper-2"
+    assert len(db.rows) == 3
+    # Rows with different columns never share an upsert
+    assert all(len({tuple(sorted(row)) for row in batch}) == 1 for batch in db.upserts)
+
+
+def test_invalid_rows_are_reported():
+    db = _Database([])
+    report = AnimalImporter(db, "importer", zoo_id="Z1", allowed_zoo_ids=("Z1",)).run([
+        (2, {"name": "", "species": "Lion"}),
+        (3, {"name": "Leo", "species": "Lion", "zoo_id": "Z2"}),
+    ])
+    assert report["failed"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert db.rows == []
@@ -0,0 +1,65 @@
+import asyncio
+import gzip
+import httpx
+from fastapi import FastAPI, Response
+from app import compression
+from app.compression import CompressionMiddleware, negotiate_encoding
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    async def big():
+        return {"rows": ["lion"] * 100}
+
+    @app.get("/small")
+    async def small():
+        return {"rows": []}
+
+    @app.get("/partial")
+    async def partial():
+        return Response(b"x" * 500, status_code=206, media_type="application/json")
+
+    return app
+
+
+def _get(path: str, accept_encoding: str) -> httpx.Response:
+    async def call():
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Read the raw body so the client does not undo the encoding
+            async with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+                response.raw_body = b"".join([chunk async for chunk in response.aiter_raw()])
+                return response
+    return asyncio.run(call())
+
+
+def test_negotiate_encoding(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("br;q=1.0, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("") is None
+
+
+def test_large_json_is_gzipped(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response = _get("/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(response.raw_body))
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert gzip.decompress(response.raw_body).startswith(b'{"rows":["lion"')
+
+
+def test_small_and_partial_responses_pass_through():
+    for path in ("/small", "/partial"):
+        response = _get(path, "gzip")
+        assert "content-encoding" not in response.headers
+
+
+def test_client_without_compression_gets_identity():
+    assert "content-encoding" not in _get("/big", "identity").headers
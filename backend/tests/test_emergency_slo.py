@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+import httpx
+from starlette.concurrency import run_in_threadpool
+from app.main import app
+from app.resilience import deepgram_admission, gemini_admission
+from app.routes.auth import create_access_token
+
+ACK_BUDGET_SECONDS = 0.1
+ALERTS = 20
+
+
+def test_sos_acknowledged_within_budget_while_ai_is_saturated():
+    token = create_access_token({"sub": "keeper@zoo.test", "uid": "00000000-0000-0000-0000-000000000001"})
+    release = threading.Event()
+
+    def blocked_vendor_call():
+        release.wait(timeout=30)
+
+    async def scenario():
+        # Fill both vendors' concurrency slots and wait queues, plus the
+        # shared thread pool, with calls that only return once released
+        saturation = [
+            asyncio.ensure_future(admission.run(blocked_vendor_call))
+            for admission in (gemini_admission, deepgram_admission)
+            for _ in range(admission.max_concurrency + admission.max_queue)
+        ]
+        saturation += [asyncio.ensure_future(run_in_threadpool(blocked_vendor_call)) for _ in range(40)]
+        await asyncio.sleep(0.2)
+        assert gemini_admission.stats()["waiting"] == gemini_admission.max_queue
+        assert deepgram_admission.stats()["waiting"] == deepgram_admission.max_queue
+
+        latencies = []
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                for i in range(ALERTS):
+                    started = time.perf_counter()
+                    response = await client.post(
+                        "/api/observations/emergency-alert",
+                        json={"description": f"lion escaped {i}"},
+                        headers={"Authorization": f"Bearer {token}"},
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 200
+                    assert response.json()["data"]["created_by"] == "00000000-0000-0000-0000-000000000001"
+        finally:
+            release.set()
+            await asyncio.gather(*saturation, return_exceptions=True)
+        return latencies
+
+    latencies = asyncio.run(scenario())
+    assert max(latencies) < ACK_BUDGET_SECONDS, f"slowest SOS acknowledgement took {max(latencies) * 1000:.1f} ms"
+
+
+def test_sos_requires_a_valid_token():
+    async def post(headers):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/observations/emergency-alert", json={}, headers=headers)
+
+    assert asyncio.run(post({})).status_code == 401
+    assert asyncio.run(post({"Authorization": "Bearer not-a-token"})).status_code == 401
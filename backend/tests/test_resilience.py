@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from app.resilience import AdmissionController, CircuitBreaker, IdempotencyStore
+
+
+def test_idempotency_replays_the_first_result():
+    calls = []
+
+    async def create(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return {"id": value}
+
+    async def scenario():
+        store = IdempotencyStore(ttl=60, max_entries=10)
+        # The retry arrives while the original is still running
+        first, retry = await asyncio.gather(store.run("key", "fp", create, "a"), store.run("key", "fp", create, "a"))
+        later = await store.run("key", "fp", create, "a")
+        return first, retry, later
+
+    first, retry, later = asyncio.run(scenario())
+    assert first == ({"id": "a"}, False)
+    assert retry == ({"id": "a"}, True)
+    assert later == ({"id": "a"}, True)
+    assert calls == ["a"]
+
+
+def test_idempotency_key_reused_for_another_request_is_rejected():
+    async def create(value):
+        return {"id": value}
+
+    async def scenario():
+        store = IdempotencyStore(ttl=60, max_entries=10)
+        await store.run("key", "fp-1", create, "a")
+        await store.run("key", "fp-2", create, "b")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+
+
+def test_failed_request_can_be_retried():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("vendor down")
+        return "ok"
+
+    async def scenario():
+        store = IdempotencyStore(ttl=60, max_entries=10)
+        with pytest.raises(RuntimeError):
+            await store.run("key", "fp", flaky)
+        return await store.run("key", "fp", flaky)
+
+    assert asyncio.run(scenario()) == ("ok", False)
+
+
+def test_admission_sheds_load_once_the_queue_is_full():
+    release = threading.Event()
+
+    def blocked():
+        release.wait(timeout=5)
+
+    async def scenario():
+        admission = AdmissionController("Gemini", max_concurrency=1, max_queue=1, queue_timeout=5, retry_after=7)
+        running = asyncio.ensure_future(admission.run(blocked))
+        queued = asyncio.ensure_future(admission.run(blocked))
+        await asyncio.sleep(0.05)
+        assert admission.stats()["waiting"] == 1
+        try:
+            with pytest.raises(HTTPException) as error:
+                await admission.run(blocked)
+        finally:
+            release.set()
+            await asyncio.gather(running, queued)
+        return error.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "7"
+
+
+def test_breaker_opens_then_lets_one_probe_through_before_closing():
+    breaker = CircuitBreaker("Gemini", failure_rate=0.5, window=4, min_calls=2, open_seconds=0.05)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only the single probe is let through
+
+    breaker.record(True, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_the_breaker_again():
+    breaker = CircuitBreaker("Gemini", failure_rate=0.5, window=4, min_calls=2, open_seconds=0.05)
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
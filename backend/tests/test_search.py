@@ -0,0 +1,51 @@
+from app.search import ObservationSearchIndex
+
+
+def _observation(doc_id: str, zoo_id: str, zookeeper_id: str) -> dict:
+    return {
+        "id": doc_id,
+        "zoo_id": zoo_id,
+        "zookeeper_id": zookeeper_id,
+        "normal_behaviour_details": "lion limping",
+        "created_at": "2024-01-01T00:00:00",
+    }
+
+
+def _index() -> ObservationSearchIndex:
+    """A small zoo's documents buried under a newer, bigger zoo's."""
+    index = ObservationSearchIndex()
+    index.MAX_POSTINGS_PER_TERM = 3
+    for n in range(5):
+        index.add(_observation(f"small-{n}", "small", "k-small"))
+    for n in range(12):
+        index.add(_observation(f"big-{n}", "big", "k-big"))
+    return index
+
+
+def test_filters_apply_before_the_postings_cap():
+    index = _index()
+    small = {f"small-{n}" for n in range(5)}
+
+    by_zoo = index.search("limping", zoo_ids=("small",))
+    assert by_zoo["total"] == 5
+    assert by_zoo["hits"] and {hit["id"] for hit in by_zoo["hits"]} <= small
+
+    by_keeper = index.search("limping", zookeeper_id="k-small")
+    assert by_keeper["total"] == 5
+    assert by_keeper["hits"] and {hit["id"] for hit in by_keeper["hits"]} <= small
+
+
+def test_total_counts_documents_past_the_cap():
+    result = _index().search("limping")
+    assert result["truncated"] is True
+    assert result["total"] == 17
+    assert len(result["hits"]) == 3
+
+
+def test_reindexing_replaces_earlier_text():
+    index = ObservationSearchIndex()
+    observation = _observation("o1", "small", "k-small")
+    index.add({**observation, "vet_comments": "suspected fracture"})
+    index.add({**observation, "vet_comments": "sprain, resting"})
+    assert index.search("fracture")["total"] == 0
+    assert index.search("sprain")["total"] == 1
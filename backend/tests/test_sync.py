@@ -0,0 +1,85 @@
+import asyncio
+import httpx
+from app.main import app
+from app.routes import sync
+from app.routes.auth import get_current_user
+
+
+class _Query:
+    """Records the filters a query was built with."""
+
+    def __init__(self, log, table):
+        self.log = log
+        self.calls = [("table", table)]
+        log.append(self.calls)
+
+    def __getattr__(self, name):
+        def record(*args):
+            self.calls.append((name, *args))
+            return self
+        return record
+
+    def execute(self):
+        return type("Result", (), {"data": []})()
+
+
+class _Database:
+    def __init__(self):
+        self.queries = []
+
+    def table(self, name):
+        return _Query(self.queries, name)
+
+
+def _post(user: dict, body: dict, monkeypatch):
+    db = _Database()
+    monkeypatch.setattr(sync, "get_supabase", lambda: db)
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        async def call():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post("/api/sync/", json=body)
+        return asyncio.run(call()), db
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def _tombstone_query(db):
+    return next(calls for calls in db.queries if calls[0] == ("table", "deleted_records"))
+
+
+def test_tombstones_are_limited_to_the_users_zoo(monkeypatch):
+    user = {"id": "u1", "role": "vet", "zoo_id": "Z1"}
+    response, db = _post(user, {"tables": ["animals"], "since": {"deleted": "41"}}, monkeypatch)
+
+    assert response.status_code == 200
+    calls = _tombstone_query(db)
+    assert ("eq", "zoo_id", "Z1") in calls
+    assert ("gt", "seq", 41) in calls
+    assert response.json()["deleted"] == {"ids": {}, "cursor": "41", "has_more": False}
+
+
+def test_global_users_see_every_tombstone(monkeypatch):
+    user = {"id": "u1", "role": "admin", "zoo_id": None}
+    response, db = _post(user, {"tables": ["animals"]}, monkeypatch)
+
+    assert response.status_code == 200
+    assert not [call for call in _tombstone_query(db) if call[0] in ("eq", "in_") and call[1] == "zoo_id"]
+
+
+def test_malformed_deleted_cursor_is_a_bad_request(monkeypatch):
+    user = {"id": "u1", "role": "vet", "zoo_id": None}
+    for cursor in ("abc", "-1", "4.5", "²"):
+        response, _ = _post(user, {"since": {"deleted": cursor}}, monkeypatch)
+        assert response.status_code == 400
+
+
+def test_change_cursor_pages_after_the_last_row(monkeypatch):
+    user = {"id": "u1", "role": "vet", "zoo_id": None}
+    response, db = _post(user, {"tables": ["animals"], "since": {"animals": "2024-01-01T00:00:00|a1"}}, monkeypatch)
+
+    assert response.status_code == 200
+    calls = next(calls for calls in db.queries if calls[0] == ("table", "animals"))
+    assert ("or_", 'updated_at.gt."2024-01-01T00:00:00",and(updated_at.eq."2024-01-01T00:00:00",id.gt.a1)') in calls
+    assert response.json()["tables"]["animals"]["cursor"] == "2024-01-01T00:00:00|a1"
@@ -0,0 +1,46 @@
+import io
+import pytest
+from app import uploads
+from app.uploads import MediaStore, UploadError, parse_range
+
+
+def test_parse_range():
+    assert parse_range("", 10) is None
+    assert parse_range("bytes=2-4", 10) == (2, 4)
+    assert parse_range("bytes=5-", 10) == (5, 9)
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    assert parse_range("bytes=8-100", 10) == (8, 9)
+
+
+@pytest.mark.parametrize("header, status", [
+    ("bytes=-0", 416),   # an empty suffix
+    ("bytes=5-2", 416),  # end before start
+    ("bytes=10-", 416),  # starts past the end
+    ("bytes=-", 416),
+    ("bytes=0-1,3-4", 416),
+    ("items=0-1", 416),
+])
+def test_parse_range_rejects(header, status):
+    with pytest.raises(UploadError) as error:
+        parse_range(header, 10)
+    assert error.value.status_code == status
+
+
+def test_unknown_media_type_is_rejected(tmp_path):
+    store = MediaStore(str(tmp_path))
+    with pytest.raises(UploadError) as error:
+        store.create("obs", "audio", 4)
+    assert error.value.status_code == 400
+    with pytest.raises(UploadError) as error:
+        store.save_file("obs", "exe", io.BytesIO(b"x"))
+    assert error.value.status_code == 400
+
+
+def test_single_request_upload_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 4)
+    store = MediaStore(str(tmp_path))
+    with pytest.raises(UploadError) as error:
+        store.save_file("obs", "image", io.BytesIO(b"12345"), "a.jpg")
+    assert error.value.status_code == 413
+    assert list((tmp_path / "media").iterdir()) == []
+    assert store.save_file("obs", "image", io.BytesIO(b"1234"), "a.jpg")["length"] == 4
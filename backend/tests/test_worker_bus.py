@@ -0,0 +1,51 @@
+import asyncio
+import os
+import tempfile
+from app.resilience import IdempotencyStore
+from app.worker_bus import WorkerBus
+
+
+def _workers():
+    """Two buses on one file, standing in for two worker processes."""
+    path = os.path.join(tempfile.mkdtemp(), "worker_state.sqlite3")
+    return WorkerBus(path, poll_seconds=0.01), WorkerBus(path, poll_seconds=0.01)
+
+
+def test_events_reach_the_other_worker_only():
+    first, second = _workers()
+    first._exchange()
+    second._exchange()
+
+    first.publish("invalidate", {"tables": ["animals"], "zoo_id": "z1"})
+    assert first._exchange() == []
+    assert second._exchange() == [("invalidate", {"tables": ["animals"], "zoo_id": "z1"})]
+    assert second._exchange() == []
+
+
+def test_retry_on_another_worker_replays_the_first_response():
+    first, second = _workers()
+    calls = []
+
+    async def create():
+        calls.append(1)
+        return {"id": "obs-1"}
+
+    async def scenario():
+        a = IdempotencyStore(ttl=60, max_entries=10, shared=first)
+        b = IdempotencyStore(ttl=60, max_entries=10, shared=second)
+        original = await a.run("key-1", "fp", create)
+        retry = await b.run("key-1", "fp", create)
+        return original, retry
+
+    original, retry = asyncio.run(scenario())
+    assert original == ({"id": "obs-1"}, False)
+    assert retry == ({"id": "obs-1"}, True)
+    assert len(calls) == 1
+
+
+def test_abandoned_claim_is_taken_over():
+    first, second = _workers()
+    assert first.claim("key-1", "fp", ttl=60, abandon_after=60) == ("claimed", None)
+    assert second.claim("key-1", "fp", ttl=60, abandon_after=60) == ("running", None)
+    assert second.claim("key-1", "other", ttl=60, abandon_after=60) == ("mismatch", None)
+    assert second.claim("key-1", "fp", ttl=60, abandon_after=0) == ("claimed", None)
@@ -99,6 +99,41 @@ export const api = {
     return response.json();
   },
 
+  // Dashboard
+  async getDashboard(role: 'admin' | 'officer' | 'vet' | 'zookeeper') {
+    const response = await fetch(`${API_URL}/api/dashboard/${role}`, {
+      headers: getAuthHeaders()
+    });
+    if (!response.ok) {
+      const errorText = await response.text().catch(() => '');
+      throw new Error(`${response.status}: Failed to fetch dashboard - ${errorText}`);
+    }
+    return response.json();
+  },
+
+  // Zoos
+  async getZoos() {
+    const response = await fetch(`${API_URL}/api/zoos/`, {
+      headers: getAuthHeaders()
+    });
+    if (!response.ok) {
+      const errorText = await response.text().catch(() => '');
+      throw new Error(`${response.status}: Failed to fetch zoos - ${errorText}`);
+    }
+    return response.json();
+  },
+
+  async getZooRollup(zooId: string, days: number = 7) {
+    const response = await fetch(`${API_URL}/api/zoos/${zooId}/rollup?days=${days}`, {
+      headers: getAuthHeaders()
+    });
+    if (!response.ok) {
+      const errorText = await response.text().catch(() => '');
+      throw new Error(`${response.status}: Failed to fetch zoo rollup - ${errorText}`);
+    }
+    return response.json();
+  },
+
   // Auth
   async login(username: string, password: string) {
     const formData = new FormData();